@@ -2,7 +2,8 @@
 Configuration settings for Heritage Provenance System
 """
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
 from typing import List
 import os
 
@@ -15,6 +16,10 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Each worker loads its own copy of the RDF graph, so keep this small on memory-limited hosts
+    WORKERS: int = 1
+    # Token for maintenance endpoints (cache clearing, statistics refresh), sent as X-Admin-Token; they are disabled while it is empty
+    ADMIN_TOKEN: str = ""
     
     # CORS
     ALLOWED_ORIGINS: List[str] = [
@@ -27,6 +32,9 @@ class Settings(BaseSettings):
     # RDF Store (Virtuoso or GraphDB)
     RDF_STORE_TYPE: str = "rdflib" 
     RDF_STORE_URL: str = "http://localhost:8890/sparql"
+    # Threads available for blocking rdflib queries run off the event loop
+    RDF_QUERY_THREADS: int = 8
+    BASE_URI: str = "http://arp-greatteam.org/heritage-provenance/"
 
     # External Data Sources
     DBPEDIA_SPARQL: str = "https://dbpedia.org/sparql"
@@ -38,12 +46,56 @@ class Settings(BaseSettings):
     GETTY_AAT_SPARQL: str = "http://vocab.getty.edu/sparql"
     GETTY_ULAN_SPARQL: str = "http://vocab.getty.edu/sparql"
     GETTY_TGN_SPARQL: str = "http://vocab.getty.edu/sparql"
+    # Seconds after which the Getty endpoint (GraphDB) abandons a query; the client waits a little
+    # longer so the server's own timeout answer arrives before the connection is dropped
+    GETTY_SPARQL_SERVER_TIMEOUT: int = 25
+    GETTY_SPARQL_CLIENT_TIMEOUT: float = 30.0
+    
+    # Outbound HTTP connection pool (shared by external services)
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    # Concurrent Wikidata lookups per request when enriching lists (stays under Wikidata's rate limits)
+    WIKIDATA_MAX_CONCURRENCY: int = 10
+    
+    # Cache for external lookups (Wikidata, Getty)
+    EXTERNAL_CACHE_TTL: int = 86400
+    EXTERNAL_CACHE_SIZE: int = 4096
+    # Saved on shutdown and reloaded on startup so restarts don't repeat every lookup ("" disables)
+    EXTERNAL_CACHE_FILE: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "external_cache.json")
  
     
+    # Cache for single artwork / location / event lookups
+    ENTITY_CACHE_TTL: int = 600
+    ENTITY_CACHE_SIZE: int = 4096
+    
+    # Parsed SPARQL queries kept for reuse (parsing is a large share of a small query's cost)
+    PREPARED_QUERY_CACHE_SIZE: int = 512
+    
+    # Cache for SPARQL query results
+    SPARQL_CACHE_TTL: int = 300
+    SPARQL_CACHE_SIZE: int = 512
+    
+    # Cache for dashboard aggregate responses (statistics, map)
+    AGGREGATE_CACHE_TTL: int = 300
+    AGGREGATE_CACHE_SIZE: int = 256
+    
+    # Browser / CDN caching of read-only GET responses
+    HTTP_CACHE_MAX_AGE: int = 60
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 300
+    HTTP_NOT_FOUND_MAX_AGE: int = 30
+    
+    # Response compression (bodies smaller than the minimum are sent as-is)
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 5
+    
     # Recommendation Engine
     SIMILARITY_THRESHOLD: float = 0.7
     MAX_RECOMMENDATIONS: int = 10
     
+    # Lists longer than this are streamed instead of encoded in one piece
+    STREAM_MIN_ITEMS: int = 500
+    
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
@@ -55,9 +107,13 @@ class Settings(BaseSettings):
     # Data Directory
     DATA_DIR: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the parsed settings, reading .env and the environment only once per process"""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,29 @@
+"""
+FastAPI dependencies for shared services
+Services are created once in the application lifespan and kept on app.state
+"""
+
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException, Request
+from app.config import settings
+from app.services.external_data import WikidataService, GettyService
+
+
+def get_wikidata(request: Request) -> WikidataService:
+    """Shared Wikidata service backed by the pooled HTTP client"""
+    return request.app.state.wikidata
+
+
+def get_getty(request: Request) -> GettyService:
+    """Shared Getty vocabularies service"""
+    return request.app.state.getty
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for maintenance endpoints: 404 unless ADMIN_TOKEN is configured, 403 without the matching header"""
+    
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
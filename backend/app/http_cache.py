@@ -0,0 +1,66 @@
+"""
+HTTP caching helpers for read-only endpoints
+Responses carry a strong ETag and Cache-Control so browsers and CDNs can revalidate cheaply
+"""
+
+import hashlib
+import orjson
+from typing import Any, Dict
+from fastapi import HTTPException, Request, Response
+from app.config import settings
+
+
+CACHE_CONTROL = (
+    f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+)
+NOT_FOUND_CACHE_CONTROL = f"public, max-age={settings.HTTP_NOT_FOUND_MAX_AGE}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check an If-None-Match header (which may list several tags) against the current ETag"""
+    
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Validator and freshness headers sent with cacheable responses"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def graph_etag(request: Request) -> str:
+    """ETag for a response computed only from the local graph: it changes when the graph
+    generation changes, so it can be checked before running any query.
+    
+    The generation alone repeats across restarts and workers, so the store's per-load token is part of the tag.
+    """
+    
+    rdf_service = request.app.state.rdf_service
+    key = f"{rdf_service.load_token}:{rdf_service.generation}:{request.url.path}?{request.url.query}"
+    return f'"{hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()}"'
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 answer that repeats the validator headers"""
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def not_found(detail: Dict[str, Any]) -> HTTPException:
+    """404 for a missing entity, briefly cacheable so repeated misses don't reach the graph"""
+    return HTTPException(status_code=404, detail=detail, headers={"Cache-Control": NOT_FOUND_CACHE_CONTROL})
+
+
+def cached_json_response(request: Request, body: Any) -> Response:
+    """Serialize body once, tag it with a content digest and answer 304 when the client already has it"""
+    
+    content = orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS)
+    etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return Response(content=content, media_type="application/json", headers=cache_headers(etag))
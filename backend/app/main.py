@@ -3,24 +3,85 @@ Main FastAPI application for Heritage Provenance System
 Provides REST API for artwork provenance management with SPARQL endpoint
 """
 
-from fastapi import FastAPI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import httpx
+import orjson
 import structlog
 
 from app.routers import artworks, artists, provenance, locations, sparql, recommendations, visualization
-from app.config import settings
+from app.config import get_settings
 from app.services.rdf_store import RDFStoreService
+from app.services.external_data import WikidataService, GettyService
+from app.services.stats_aggregator import StatsAggregator
+from app.services.cache import load_external_cache, save_external_cache
 
 logger = structlog.get_logger()
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services before serving requests and clean them up on shutdown"""
+    logger.info("Starting Heritage Provenance System")
+    
+    # rdflib queries are CPU-bound and run through asyncio.to_thread; bound how many run at once
+    executor = ThreadPoolExecutor(max_workers=settings.RDF_QUERY_THREADS, thread_name_prefix="rdf-query")
+    asyncio.get_running_loop().set_default_executor(executor)
+    
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=settings.HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+    app.state.http_client = http_client
+    if settings.EXTERNAL_CACHE_FILE:
+        load_external_cache(settings.EXTERNAL_CACHE_FILE)
+    app.state.wikidata = WikidataService(client=http_client)
+    app.state.getty = GettyService(client=http_client)
+    
+    rdf_service = None
+    try:
+        rdf_service = RDFStoreService()
+        await rdf_service.initialize()
+        app.state.rdf_service = rdf_service
+        app.state.stats_service = StatsAggregator(rdf_service)
+        await app.state.stats_service.refresh()
+        logger.info("RDF store initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize RDF store: {e}")
+    
+    yield
+    
+    logger.info("Shutting down Heritage Provenance System")
+    await http_client.aclose()
+    if settings.EXTERNAL_CACHE_FILE:
+        save_external_cache(settings.EXTERNAL_CACHE_FILE)
+    if rdf_service is not None:
+        await rdf_service.close()
+    executor.shutdown(wait=False)
+
 
 app = FastAPI(
     title="Heritage Provenance System",
     description="API for modeling and managing artwork provenance with integration to DBpedia, Wikidata, Getty vocabularies, and Romanian heritage",
     version="1.0.0",
     docs_url="/api/docs",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+app.state.settings = settings
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -28,6 +89,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL)
 
 app.include_router(artworks.router, prefix="/api/artworks", tags=["Artworks"])
 app.include_router(artists.router, prefix="/api/artists", tags=["Artists"])
@@ -38,49 +100,38 @@ app.include_router(recommendations.router, prefix="/api/recommendations", tags=[
 app.include_router(visualization.router, prefix="/api/visualization", tags=["Visualization"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    logger.info("Starting Heritage Provenance System")
-    
-    try:
-        rdf_service = RDFStoreService()
-        await rdf_service.initialize()
-        app.state.rdf_service = rdf_service
-        logger.info("RDF store initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize RDF store: {e}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("Shutting down Heritage Provenance System")
+# The system information never changes at runtime, so it is encoded once at import
+ROOT_INFO = orjson.dumps({
+    "name": "Heritage Provenance System",
+    "version": "1.0.0",
+    "description": "API for managing artwork provenance with semantic web integration",
+    "endpoints": {
+        "docs": "/api/docs",
+        "artworks": "/api/artworks",
+        "artists": "/api/artists",
+        "provenance": "/api/provenance",
+        "locations": "/api/locations",
+        "sparql": "/api/sparql",
+        "recommendations": "/api/recommendations",
+        "visualization": "/api/visualization"
+    },
+    "integrations": [
+        "Wikidata",
+        "Getty Vocabularies (AAT, ULAN, TGN)",
+        "Romanian Heritage"
+    ]
+})
 
 
 @app.get("/")
 async def root():
     """Root endpoint with system information"""
-    return {
-        "name": "Heritage Provenance System",
-        "version": "1.0.0",
-        "description": "API for managing artwork provenance with semantic web integration",
-        "endpoints": {
-            "docs": "/api/docs",
-            "artworks": "/api/artworks",
-            "artists": "/api/artists",
-            "provenance": "/api/provenance",
-            "locations": "/api/locations",
-            "sparql": "/api/sparql",
-            "recommendations": "/api/recommendations",
-            "visualization": "/api/visualization"
-        },
-        "integrations": [
-            "Wikidata",
-            "Getty Vocabularies (AAT, ULAN, TGN)",
-            "Romanian Heritage"
-        ]
-    }
+    return Response(ROOT_INFO, media_type="application/json", headers={"Cache-Control": "public, max-age=86400"})
+
+
+# Each (method, path) must be registered once; Starlette would silently serve the first match
+_route_keys = [(method, route.path) for route in app.routes for method in getattr(route, "methods", None) or ()]
+assert len(set(_route_keys)) == len(_route_keys), "Duplicate API routes registered"
 
 
 if __name__ == "__main__":
@@ -89,5 +140,6 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.WORKERS
     )
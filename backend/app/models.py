@@ -2,12 +2,22 @@
 Data models for the Heritage Provenance System
 """
 
-from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional, Dict, Any
+import re
+from functools import lru_cache
+from pydantic import BaseModel, Field, TypeAdapter, constr
+from typing import List, Literal, Optional, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 
 
+# Local identifiers (UUIDs minted by the importer, Getty numeric IDs) as accepted in paths and filters;
+# anything else is rejected before it can reach a SPARQL query
+EntityId = constr(pattern=r"^[A-Za-z0-9_-]{1,64}$")
+
+# Optional ID filter in a query string: an entity ID, or "" for no filter (sent by the frontend's unset dropdowns)
+EntityFilter = Optional[Union[Literal[""], EntityId]]
+
+
 class ProvenanceEventType(str, Enum):
     """Types of provenance events"""
     ACQUISITION = "acquisition"
@@ -49,54 +59,40 @@ class ArtworkType(str, Enum):
         if isinstance(text, dict):
             if 'label' in text.keys():
                 text = text['label']
-            
-        text = text.lower()
-        
-        # Drawing / Graphics
-        if any(w in text for w in [
-            "desen", "drawing", "schiță", "schita", "sketch", "creion", "pencil", 
-            "cărbune", "charcoal", "tuș", "ink", "pastel", "grafică", "graphic"
-        ]):
-            return cls.DRAWING
-            
-        # Prints
-        if any(w in text for w in [
-            "gravură", "gravura", "print", "litografie", "lithograph", "acvaforte", 
-            "etching", "xilogravură", "woodcut", "stampă", "serigrafie"
-        ]):
-            return cls.PRINT
-            
-        # Photography
-        if any(w in text for w in [
-            "fotografie", "fotografia", "photograph", "photo", "foto", 
-            "negativ", "negative", "daguerreotype"
-        ]):
-            return cls.PHOTOGRAPH
-            
-        # Manuscript
-        if any(w in text for w in ["manuscris", "manuscript", "document", "scrisoare", "letter", "incunabul", "carte"]):
-            return cls.MANUSCRIPT
-            
-        # Installation
-        if any(w in text for w in ["instalație", "instalatie", "installation"]):
-            return cls.INSTALLATION
-            
-        # Artifacts
-        if any(w in text for w in [
-            "artefact", "artifact", "ceramică", "ceramic", "pottery", "porțelan", 
-            "textil", "textile", "covor", "carpet", "tapiserie", "monedă", "coin", 
-            "bijuterie", "jewelry", "mobilier", "furniture", "vas", "vessel"
-        ]):
-            return cls.ARTIFACT
-            
-        # Sculpture (check materials often used in sculpture)
-        if any(w in text for w in ["sculptură", "sculptura", "sculpture", "statuie", "statue", "bust", "relief", "bronz", "bronze", "marmură", "marble", "ronde-bosse"]):
-            return cls.SCULPTURE
-
-        if any(w in text for w in ["pictură", "pictura", "painting", "ulei", "oil", "pânză", "panza", "canvas"]):
-            return cls.PAINTING
         
-        return cls.ARTIFACT
+        return _classify(str(text))
+
+
+# Keywords per artwork type (Romanian and English), in matching priority order.
+# Materials often used in sculpture and painting are checked last.
+TYPE_KEYWORDS = {
+    "drawing": ("desen", "drawing", "schiță", "schita", "sketch", "creion", "pencil", "cărbune", "charcoal", "tuș", "ink", "pastel", "grafică", "graphic"),
+    "print": ("gravură", "gravura", "print", "litografie", "lithograph", "acvaforte", "etching", "xilogravură", "woodcut", "stampă", "serigrafie"),
+    "photograph": ("fotografie", "fotografia", "photograph", "photo", "foto", "negativ", "negative", "daguerreotype"),
+    "manuscript": ("manuscris", "manuscript", "document", "scrisoare", "letter", "incunabul", "carte"),
+    "installation": ("instalație", "instalatie", "installation"),
+    "artifact": ("artefact", "artifact", "ceramică", "ceramic", "pottery", "porțelan", "textil", "textile", "covor", "carpet", "tapiserie", "monedă", "coin", "bijuterie", "jewelry", "mobilier", "furniture", "vas", "vessel"),
+    "sculpture": ("sculptură", "sculptura", "sculpture", "statuie", "statue", "bust", "relief", "bronz", "bronze", "marmură", "marble", "ronde-bosse"),
+    "painting": ("pictură", "pictura", "painting", "ulei", "oil", "pânză", "panza", "canvas")
+}
+
+# One compiled, case-insensitive alternation per type, so each category is a single
+# C-level scan and the description never has to be lower-cased into a new string
+_TYPE_PATTERNS = tuple(
+    (ArtworkType(type_value), re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE))
+    for type_value, keywords in TYPE_KEYWORDS.items()
+)
+
+
+@lru_cache(maxsize=8192)
+def _classify(text: str) -> ArtworkType:
+    """Match a description against the type patterns; collections repeat the same few descriptions, so results are memoised"""
+    
+    for artwork_type, pattern in _TYPE_PATTERNS:
+        if pattern.search(text):
+            return artwork_type
+    
+    return ArtworkType.ARTIFACT
 
 
 class ExternalLink(BaseModel):
@@ -163,7 +159,7 @@ class Artwork(BaseModel):
 class SPARQLQuery(BaseModel):
     """SPARQL query request"""
     query: str = Field(..., description="SPARQL query string")
-    output_format: str = Field("json", description="Output format: json, xml, csv, tsv")
+    output_format: Literal["json", "xml", "csv", "tsv"] = Field("json", description="Output format: json, xml, csv, tsv")
     reasoning: bool = Field(False, description="Enable OWL reasoning")
 
 
@@ -191,6 +187,10 @@ class Recommendation(BaseModel):
     reasons: List[str] = Field(..., description="Reasons for recommendation")
 
 
+# Serialize a whole recommendation list in a single pydantic-core call instead of once per model
+RECOMMENDATION_LIST_ADAPTER = TypeAdapter(List[Recommendation])
+
+
 class Statistics(BaseModel):
     """Statistical information about the collection"""
     total_artworks: int
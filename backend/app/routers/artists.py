@@ -3,23 +3,28 @@ Artists API router
 Endpoints for managing artists
 """
 
+import asyncio
 import structlog
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Query, Request
-from app.services import wikidata_parser_for_artist
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from app.config import settings
+from app.models import EntityFilter, EntityId
+from app.services import wikidata_parser_for_artist_binding
 from app.services.external_data import WikidataService, GettyService
+from app.http_cache import cached_json_response
+from app.deps import get_wikidata, get_getty
+from app.uris import ARTIST_URI_PREFIX, LOCATION_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
-wikidata = WikidataService()
-getty = GettyService()
 
 
 @router.get("/")
 async def list_artists(
     request: Request,
-    location_id: str = Query(None, description="Filter by location ID where they created artworks"),
-    limit: int = Query(100, ge=1, description="Maximum number of results")
+    location_id: EntityFilter = Query(None, description="Filter by location ID where they created artworks"),
+    limit: int = Query(None, ge=1, description="Maximum number of results (all when omitted)"),
+    skip: int = Query(0, ge=0, description="Number of results to skip")
 ):
     """List all artists with optional filters"""
     
@@ -28,13 +33,13 @@ async def list_artists(
     try:
         filters = {}
         if location_id and location_id != '':
-            filters['location_uri'] = f"http://arp-greatteam.org/heritage-provenance/location/{location_id}"
+            filters['location_uri'] = LOCATION_URI_PREFIX + location_id
         
-        artists = rdf_service.get_all_artists(filters=filters, limit=limit)
-        return {
+        artists = await asyncio.to_thread(rdf_service.get_all_artists, filters=filters, limit=limit, skip=skip)
+        return cached_json_response(request, {
             "count": len(artists),
             "artists": artists
-        }
+        })
     except Exception as e:
         logger.error(f"Error retrieving artists: {e}")
         return {
@@ -44,14 +49,14 @@ async def list_artists(
         }
 
 @router.get("/{artist_id}")
-async def get_artist(artist_id: str, request: Request):
+async def get_artist(artist_id: EntityId, request: Request, wikidata: WikidataService = Depends(get_wikidata)):
     """Get a specific artist by ID with complete details"""
     
     rdf_service = request.app.state.rdf_service
-    artist_uri = f"http://arp-greatteam.org/heritage-provenance/artist/{artist_id}"
+    artist_uri = ARTIST_URI_PREFIX + artist_id
 
     try:
-        artist = rdf_service.get_artist(artist_uri)
+        artist = await asyncio.to_thread(rdf_service.get_artist, artist_uri)
         
         if artist is None:
             return {
@@ -59,9 +64,9 @@ async def get_artist(artist_id: str, request: Request):
                 "artist_id": artist_id
             }
         else:
-            artist = await wikidata_enrichment(artist)
+            artist = await wikidata_enrichment(artist, wikidata)
             
-        return artist
+        return cached_json_response(request, artist)
         
     except Exception as e:
         logger.error(f"Error retrieving artist {artist_id}: {e}")
@@ -71,26 +76,29 @@ async def get_artist(artist_id: str, request: Request):
         }
 
 @router.get("/getty/{artist_getty_id}")
-async def get_artist(artist_getty_id: str, request: Request):
+async def get_artist_by_getty_id(
+    artist_getty_id: EntityId,
+    request: Request,
+    wikidata: WikidataService = Depends(get_wikidata),
+    getty: GettyService = Depends(get_getty)
+):
     """Get a specific artist by GETTY ID with complete details"""
     
     rdf_service = request.app.state.rdf_service
 
     try:
-        artists = rdf_service.get_artist_by_getty_id(artist_getty_id)
+        artists = await asyncio.to_thread(rdf_service.get_artist_by_getty_id, artist_getty_id)
 
-        for artist in artists:
+        for index, artist in enumerate(artists):
             if artist.get('name') is None:
-                temp_artist = {
+                artists[index] = {
                     'id': '',
                     'name': None,
-                    'wikidata_id': getty.get_wikidata_id(artist_getty_id),
+                    'wikidata_id': await getty.get_wikidata_id(artist_getty_id),
                     "getty_link": artist_getty_id
                 }
-                artist = temp_artist
-            artist = await wikidata_enrichment(artist)  
         
-        return artists
+        return await wikidata_enrichment_batch(artists, wikidata)
         
     except Exception as e:
         logger.error(f"Error retrieving artist {artist_getty_id}: {e}")
@@ -99,23 +107,20 @@ async def get_artist(artist_getty_id: str, request: Request):
             "artist_getty_link": artist_getty_id
         }
 
-async def wikidata_enrichment(artist: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+async def wikidata_enrichment(artist: Dict[str, Any], wikidata: WikidataService) -> Optional[Dict[str, Any]]:
     """Helper function to enrich artist data with Wikidata"""
     
     try:
         wikidata_response = {}
         
         if artist.get('name') is None:
-            result = await wikidata.search_wikidata(artist.get('wikidata_id'))
+            result = await wikidata.sparql_lookup(artist.get('wikidata_id'))
         else:
-            result = await wikidata.search_wikidata(artist.get('name'))
+            result = await wikidata.sparql_lookup(artist.get('name'))
         
-        if result and 'search' in result and len(result['search']) > 0:
-            wikidata_id = result['search'][0]['id']
-            wikidata_info = await wikidata.get_entity(wikidata_id)
-            
-            wikidata_response['wikidata_id'] = wikidata_id
-            wikidata_response['data'] = wikidata_parser_for_artist(wikidata_info)
+        if result:
+            wikidata_response['wikidata_id'] = result['item']['value'].rsplit('/', 1)[-1]
+            wikidata_response['data'] = wikidata_parser_for_artist_binding(result)
         else:
             wikidata_response['message'] = 'No results found'
     except Exception as e:
@@ -125,3 +130,14 @@ async def wikidata_enrichment(artist: Dict[str, Any]) -> Optional[Dict[str, Any]
     artist['wikidata_enrichment'] = wikidata_response
     return artist
 
+
+async def wikidata_enrichment_batch(artists: List[Dict[str, Any]], wikidata: WikidataService) -> List[Dict[str, Any]]:
+    """Enrich several artists with the same lookup as the detail view, at most WIKIDATA_MAX_CONCURRENCY in flight"""
+    
+    semaphore = asyncio.Semaphore(settings.WIKIDATA_MAX_CONCURRENCY)
+    
+    async def enrich(artist: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await wikidata_enrichment(artist, wikidata)
+    
+    return list(await asyncio.gather(*[enrich(artist) for artist in artists]))
@@ -2,47 +2,63 @@
 Artworks API router
 Endpoints for managing artworks
 """
+import asyncio
+import orjson
 import structlog
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Query, Request
+from typing import Dict, Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.models import ArtworkType, EntityFilter, EntityId
 from app.services import wikidata_parser_for_artwork
 from app.services.external_data import WikidataService
+from app.http_cache import cached_json_response, not_found
+from app.deps import get_wikidata
+from app.uris import ARTIST_URI_PREFIX, ARTWORK_URI_PREFIX, LOCATION_URI_PREFIX, ATTRIBUTE_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
-wikidata = WikidataService()
+
+MIN_SEARCH_TITLE_LENGTH = 3
+
+# Accepted type_id values: the artwork types, or "" for no filter (sent by the type dropdown)
+TypeFilter = Optional[Literal[("",) + tuple(artwork_type.value for artwork_type in ArtworkType)]]
+
+# Query parameter -> (RDF store filter key, URI prefix); types are matched by label, so the raw value is kept
+FILTER_PARAMS = {
+    'type_id': ('type', ''),
+    'material_id': ('material_uri', ATTRIBUTE_URI_PREFIX),
+    'subject_id': ('subject_uri', ATTRIBUTE_URI_PREFIX),
+    'artist_id': ('artist_uri', ARTIST_URI_PREFIX),
+    'location_id': ('location_uri', LOCATION_URI_PREFIX),
+}
 
 
 @router.get("/")
 async def list_artworks(
     request: Request,
-    type_id: str = Query(None, description="Filter by type ID"),
-    material_id: str = Query(None, description="Filter by material ID"),
-    subject_id: str = Query(None, description="Filter by subject ID"),
-    artist_id: str = Query(None, description="Filter by artist ID"),
-    location_id: str = Query(None, description="Filter by location ID"),
+    type_id: TypeFilter = Query(None, description="Filter by type ID"),
+    material_id: EntityFilter = Query(None, description="Filter by material ID"),
+    subject_id: EntityFilter = Query(None, description="Filter by subject ID"),
+    artist_id: EntityFilter = Query(None, description="Filter by artist ID"),
+    location_id: EntityFilter = Query(None, description="Filter by location ID"),
     search: str = Query(None, description="Search term"),
-    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
-    skip: int = Query(0, ge=0, description="Number of results to skip")
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum number of results"),
+    skip: int = Query(0, ge=0, description="Number of results to skip"),
+    enrich: bool = Query(False, description="Add Wikidata enrichment to every artwork"),
+    wikidata: WikidataService = Depends(get_wikidata)
 ):
     """List all artworks with optional filters"""
     
     rdf_service = request.app.state.rdf_service
     
     try:
-        filters = {}
-        if type_id and type_id != '':
-            filters['type'] = type_id
-        if material_id and material_id != '':
-            filters['material_uri'] = f"http://arp-greatteam.org/heritage-provenance/attributes/{material_id}"
-        if subject_id and subject_id != '':
-            filters['subject_uri'] = f"http://arp-greatteam.org/heritage-provenance/attributes/{subject_id}"
-        if artist_id and artist_id != '':
-            filters['artist_uri'] = f"http://arp-greatteam.org/heritage-provenance/artist/{artist_id}"
-        if location_id and location_id != '':
-            filters['location_uri'] = f"http://arp-greatteam.org/heritage-provenance/location/{location_id}"
-        
-        artworks = rdf_service.get_all_artworks(filters=filters, search=search, limit=limit, skip=skip)
+        filters = build_filters(
+            type_id=type_id, material_id=material_id, subject_id=subject_id, artist_id=artist_id, location_id=location_id
+        )
+        artworks = await asyncio.to_thread(rdf_service.get_all_artworks, filters=filters, search=search, limit=limit, skip=skip)
+        if enrich:
+            artworks = await wikidata_enrichment_many(artworks, wikidata)
         return {
             "count": len(artworks),
             "artworks": artworks
@@ -55,41 +71,91 @@ async def list_artworks(
             "artworks": []
         }
 
+@router.get("/stream")
+async def stream_artworks(
+    request: Request,
+    type_id: TypeFilter = Query(None, description="Filter by type ID"),
+    material_id: EntityFilter = Query(None, description="Filter by material ID"),
+    subject_id: EntityFilter = Query(None, description="Filter by subject ID"),
+    artist_id: EntityFilter = Query(None, description="Filter by artist ID"),
+    location_id: EntityFilter = Query(None, description="Filter by location ID"),
+    search: str = Query(None, description="Search term"),
+    limit: int = Query(None, ge=1, description="Maximum number of results (all when omitted)"),
+    skip: int = Query(0, ge=0, description="Number of results to skip")
+):
+    """Stream artworks as newline-delimited JSON, one artwork per line.
+    
+    Lines are sent as they are serialised, but the store still sorts the full match set before the first one.
+    """
+    
+    rdf_service = request.app.state.rdf_service
+    filters = build_filters(
+        type_id=type_id, material_id=material_id, subject_id=subject_id, artist_id=artist_id, location_id=location_id
+    )
+    
+    def ndjson_lines():
+        try:
+            for artwork in rdf_service.iter_artworks(filters=filters, search=search, limit=limit, skip=skip):
+                yield orjson.dumps(artwork) + b"\n"
+        except Exception as e:
+            logger.error(f"Error streaming artworks: {e}")
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @router.get("/{artwork_id}")
-async def get_artwork(artwork_id: str, request: Request):
+async def get_artwork(artwork_id: EntityId, request: Request, wikidata: WikidataService = Depends(get_wikidata)):
     """Get a specific artwork by ID with complete details"""
     
     rdf_service = request.app.state.rdf_service
-    artwork_uri = f"http://arp-greatteam.org/heritage-provenance/artwork/{artwork_id}"
+    artwork_uri = ARTWORK_URI_PREFIX + artwork_id
     
     try:
-        artwork = rdf_service.get_artwork(artwork_uri)
-        
-        if artwork is None:
-            return {
-                "error": "Artwork not found",
-                "artwork_id": artwork_id
-            }
-        else:
-            artwork = await wikidata_enrichment(artwork)
-        
-        return artwork
-        
+        artwork = await asyncio.to_thread(rdf_service.get_artwork, artwork_uri)
+        if artwork is not None:
+            artwork = await wikidata_enrichment(artwork, wikidata)
     except Exception as e:
         logger.error(f"Error retrieving artwork {artwork_id}: {e}")
-        return {
+        raise HTTPException(status_code=500, detail={
             "error": "Failed to retrieve artwork",
             "artwork_id": artwork_id
-        }
+        })
+    
+    if artwork is None:
+        raise not_found({
+            "error": "Artwork not found",
+            "artwork_id": artwork_id
+        })
     
+    return cached_json_response(request, artwork)
 
 
-async def wikidata_enrichment(artwork: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def build_filters(**params: Optional[str]) -> Dict[str, str]:
+    """Translate artwork list query parameters into RDF store filters; empty parameters are skipped"""
+    
+    return {
+        filter_key: prefix + value
+        for param, (filter_key, prefix) in FILTER_PARAMS.items()
+        if (value := params.get(param))
+    }
+
+
+def is_searchable_title(title: str) -> bool:
+    """Titles that are too short or purely numeric (inventory numbers) never match a Wikidata entity"""
+    
+    title = title.strip()
+    return len(title) >= MIN_SEARCH_TITLE_LENGTH and not title.isdigit()
+
+
+async def wikidata_enrichment(artwork: Dict[str, Any], wikidata: WikidataService) -> Optional[Dict[str, Any]]:
     """Helper function to enrich artwork data with Wikidata"""
     
     if artwork.get('title') is None or artwork.get('title') == '':
         return artwork
     
+    if not is_searchable_title(artwork['title']):
+        artwork['wikidata_enrichment'] = {'message': 'No results found'}
+        return artwork
+    
     try:
         wikidata_response = {}
         result = await wikidata.search_wikidata(artwork.get('title'))
@@ -107,4 +173,46 @@ async def wikidata_enrichment(artwork: Dict[str, Any]) -> Optional[Dict[str, Any
 
     
     artwork['wikidata_enrichment'] = wikidata_response
-    return artwork
\ No newline at end of file
+    return artwork
+
+
+async def wikidata_enrichment_many(artworks: List[Dict[str, Any]], wikidata: WikidataService) -> List[Dict[str, Any]]:
+    """Enrich several artworks: searches run concurrently (at most WIKIDATA_MAX_CONCURRENCY in flight),
+    entity details come from batched wbgetentities requests"""
+    
+    semaphore = asyncio.Semaphore(settings.WIKIDATA_MAX_CONCURRENCY)
+    
+    async def search(title: Optional[str]) -> Optional[str]:
+        if not title or not is_searchable_title(title):
+            return None
+        async with semaphore:
+            result = await wikidata.search_wikidata(title)
+        if result and 'search' in result and len(result['search']) > 0:
+            return result['search'][0]['id']
+        return None
+    
+    wikidata_ids = await asyncio.gather(*[search(artwork.get('title')) for artwork in artworks])
+    found_ids = list(dict.fromkeys(wikidata_id for wikidata_id in wikidata_ids if wikidata_id))
+    entities = dict((await wikidata.get_entities(found_ids)).get('entities', {})) if found_ids else {}
+    
+    # A failed batch chunk leaves its IDs out; fetch those one by one
+    missing_ids = [wikidata_id for wikidata_id in found_ids if wikidata_id not in entities]
+    if missing_ids:
+        for entity_data in await asyncio.gather(*[wikidata.get_entity(wikidata_id) for wikidata_id in missing_ids]):
+            if entity_data:
+                entities.update(entity_data.get('entities', {}))
+    
+    for artwork, wikidata_id in zip(artworks, wikidata_ids):
+        if not artwork.get('title'):
+            continue
+        
+        wikidata_response = {}
+        if wikidata_id and wikidata_id in entities:
+            wikidata_response['wikidata_id'] = wikidata_id
+            wikidata_response['data'] = wikidata_parser_for_artwork({'entities': {wikidata_id: entities[wikidata_id]}})
+        else:
+            wikidata_response['message'] = 'No results found'
+        
+        artwork['wikidata_enrichment'] = wikidata_response
+    
+    return artworks
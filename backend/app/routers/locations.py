@@ -2,28 +2,42 @@
 Locations API router
 Endpoints for managing locations
 """
+import asyncio
 import structlog
-from fastapi import APIRouter, Query, Request
-from app.services.external_data import WikidataService
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models import EntityId
+from app.http_cache import cache_headers, etag_matches, graph_etag, not_found, not_modified
+from app.streaming import should_stream, stream_list_response
+from app.uris import LOCATION_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
-wikidata = WikidataService()
 
 
 
 @router.get("/")
 async def list_locations(
-    request: Request
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1, description="Maximum number of results (all when omitted)"),
+    skip: int = Query(0, ge=0, description="Number of results to skip")
 ):
     """List all locations with optional filters"""
     
     rdf_service = request.app.state.rdf_service
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        locations = rdf_service.get_all_locations()
+        locations = await asyncio.to_thread(rdf_service.get_all_locations, limit=limit, skip=skip)
+        next_skip = skip + limit if limit and len(locations) == limit else None
+        if should_stream(locations):
+            return stream_list_response({"count": len(locations), "next_skip": next_skip}, "locations", locations, headers=cache_headers(etag))
+        response.headers.update(cache_headers(etag))
         return {
             "count": len(locations),
+            "next_skip": next_skip,
             "locations": locations
         }
     except Exception as e:
@@ -36,28 +50,31 @@ async def list_locations(
     
 
 @router.get("/{location_id}")
-async def get_location(location_id: str, request: Request):
+async def get_location(location_id: EntityId, request: Request, response: Response):
     """Get a specific location by ID with complete details"""
     
     rdf_service = request.app.state.rdf_service
-    location_uri = f"http://arp-greatteam.org/heritage-provenance/location/{location_id}"
+    location_uri = LOCATION_URI_PREFIX + location_id
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     try:
-        location = rdf_service.get_location(location_uri)
-        
-        if location is None:
-            return {
-                "error": "Location not found",
-                "location_id": location_id
-            }
-        
-        return location
-        
+        location = await asyncio.to_thread(rdf_service.get_location, location_uri)
     except Exception as e:
         logger.error(f"Error retrieving location {location_id}: {e}")
-        return {
+        raise HTTPException(status_code=500, detail={
             "error": "Failed to retrieve location",
             "location_id": location_id
-        }
+        })
+    
+    if location is None:
+        raise not_found({
+            "error": "Location not found",
+            "location_id": location_id
+        })
+    
+    response.headers.update(cache_headers(etag))
+    return location
 
 
@@ -2,8 +2,13 @@
 Provenance API router
 Endpoints for managing provenance events and chains
 """
+import asyncio
 import structlog
-from fastapi import APIRouter,Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models import EntityId
+from app.http_cache import cache_headers, etag_matches, graph_etag, not_found, not_modified
+from app.streaming import should_stream, stream_list_response
+from app.uris import ARTWORK_URI_PREFIX, EVENT_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -11,16 +16,27 @@ router = APIRouter()
 
 @router.get("/")
 async def list_events(
-    request: Request
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1, description="Maximum number of results (all when omitted)"),
+    skip: int = Query(0, ge=0, description="Number of results to skip")
 ):
     """List all events with optional filters"""
     
     rdf_service = request.app.state.rdf_service
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        events = rdf_service.get_all_events()
+        events = await asyncio.to_thread(rdf_service.get_all_events, limit=limit, skip=skip)
+        next_skip = skip + limit if limit and len(events) == limit else None
+        if should_stream(events):
+            return stream_list_response({"count": len(events), "next_skip": next_skip}, "events", events, headers=cache_headers(etag))
+        response.headers.update(cache_headers(etag))
         return {
             "count": len(events),
+            "next_skip": next_skip,
             "events": events
         }
     except Exception as e:
@@ -32,41 +48,58 @@ async def list_events(
         }
     
 @router.get("/{event_id}")
-async def get_event(event_id: str, request: Request):
+async def get_event(event_id: EntityId, request: Request, response: Response):
     """Get a specific provenance event by ID with complete details"""
     
     rdf_service = request.app.state.rdf_service
-    event_uri = f"http://arp-greatteam.org/heritage-provenance/event/{event_id}"
+    event_uri = EVENT_URI_PREFIX + event_id
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     try:
-        event = rdf_service.get_event(event_uri)
-        
-        if event is None:
-            return {
-                "error": "Event not found",
-                "event_id": event_id
-            }
-        
-        return event
-        
+        event = await asyncio.to_thread(rdf_service.get_event, event_uri)
     except Exception as e:
         logger.error(f"Error retrieving event {event_id}: {e}")
-        return {
+        raise HTTPException(status_code=500, detail={
             "error": "Failed to retrieve event",
             "event_id": event_id
-        }
+        })
+    
+    if event is None:
+        raise not_found({
+            "error": "Event not found",
+            "event_id": event_id
+        })
+    
+    response.headers.update(cache_headers(etag))
+    return event
 
 @router.get("/{artwork_id}/chain")
-async def get_provenance_chain(artwork_id: str, request: Request):
+async def get_provenance_chain(
+    artwork_id: EntityId,
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1, description="Maximum number of events (whole chain when omitted)"),
+    skip: int = Query(0, ge=0, description="Number of events to skip")
+):
     """Get complete provenance chain for an artwork (all events associated with it)"""
     
     rdf_service = request.app.state.rdf_service
-    artwork_uri = f"http://arp-greatteam.org/heritage-provenance/artwork/{artwork_id}"
+    artwork_uri = ARTWORK_URI_PREFIX + artwork_id
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     try:
-        chain = rdf_service.get_provenance_chain(artwork_uri)
+        chain = await asyncio.to_thread(rdf_service.get_provenance_chain, artwork_uri, limit=limit, skip=skip)
+        next_skip = skip + limit if limit and len(chain) == limit else None
+        if should_stream(chain):
+            return stream_list_response({"count": len(chain), "next_skip": next_skip}, "chain", chain, headers=cache_headers(etag))
+        response.headers.update(cache_headers(etag))
         return {
             "count": len(chain),
+            "next_skip": next_skip,
             "chain": chain
         }
     except Exception as e:
@@ -2,11 +2,14 @@
 Recommendations API router
 Endpoints for recommendations
 """
+import asyncio
 import structlog
 from typing import List
 from fastapi import APIRouter, Request, Query
-from app.models import ArtworkType, Recommendation, RecommendationRequest, Artwork, Agent, Location
+from fastapi.responses import ORJSONResponse
+from app.models import EntityId, ArtworkType, Recommendation, RecommendationRequest, Artwork, Agent, Location, RECOMMENDATION_LIST_ADAPTER
 from app.services.recommendations import RecommendationEngine
+from app.uris import ARTIST_URI_PREFIX, ARTWORK_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -28,14 +31,14 @@ async def get_recommendations(
 
 @router.get("/{artwork_id}", response_model=List[Recommendation])
 async def get_recommendations_for_artwork(
-    artwork_id: str,
+    artwork_id: EntityId,
     request: Request,
     max_results: int = Query(10, ge=1, le=50),
     criteria: str = Query("artist,period,type,location", description="Comma-separated criteria")
 ):
     """Get recommendations for a specific artwork"""
     
-    artwork_uri = f"http://arp-greatteam.org/heritage-provenance/artwork/{artwork_id}"
+    artwork_uri = ARTWORK_URI_PREFIX + artwork_id
     criteria_list = [c.strip() for c in criteria.split(",")]
     rdf_service = request.app.state.rdf_service
     
@@ -79,7 +82,7 @@ async def get_recommendations_for_artwork(
     """
     
     try:
-        results = rdf_service.execute_sparql(query)
+        results = await asyncio.to_thread(rdf_service.execute_sparql, query)
         all_artworks = []
         target_artwork = None
         
@@ -118,7 +121,7 @@ async def get_recommendations_for_artwork(
                 target_artwork = artwork
         
         if not target_artwork:
-            target_artwork_data = rdf_service.get_artwork(artwork_uri)
+            target_artwork_data = await asyncio.to_thread(rdf_service.get_artwork, artwork_uri)
 
             if not target_artwork_data:
                 return []
@@ -158,7 +161,8 @@ async def get_recommendations_for_artwork(
             target_artwork, all_artworks, max_results=max_results, criteria=criteria_list
         )
         
-        return recommendations
+        # Already validated models: dump the list in one pass and skip response_model re-validation
+        return ORJSONResponse(RECOMMENDATION_LIST_ADAPTER.dump_python(recommendations, mode="json"))
         
     except Exception as e:
         logger.error(f"Error generating recommendations: {e}")
@@ -167,14 +171,14 @@ async def get_recommendations_for_artwork(
 
 @router.get("/artist/{artist_id}", response_model=List[Recommendation])
 async def get_recommendations_for_artist(
-    artist_id: str,
+    artist_id: EntityId,
     request: Request,
     max_results: int = Query(10, ge=1, le=50),
     criteria: str = Query("artist,period,location", description="Comma-separated criteria")
 ):
     """Get recommendations for a specific artist"""
     
-    artist_uri = f"http://arp-greatteam.org/heritage-provenance/artist/{artist_id}"
+    artist_uri = ARTIST_URI_PREFIX + artist_id
     criteria_list = [c.strip() for c in criteria.split(",")]
     
     logger.info(f"Getting recommendations for {artist_uri} with criteria: {criteria_list}")
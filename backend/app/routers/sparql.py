@@ -3,38 +3,42 @@ SPARQL endpoint router
 Provides SPARQL query interface
 """
 import time
+import orjson
 import structlog
 from app.models import SPARQLQuery, SPARQLResult
+from app.services.sparql_cache import cached_execute
+from app.streaming import iter_json_array, should_stream
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 logger = structlog.get_logger()
 router = APIRouter()
 
 
-@router.post("/query")
+@router.post("/query", response_model=SPARQLResult)
 async def sparql_query(sparql_request: SPARQLQuery, request: Request):
     """Execute SPARQL query against the RDF store"""
     
     rdf_service = request.app.state.rdf_service
     
     try:
-        start_time = time.time()
-        results = rdf_service.execute_sparql(sparql_request.query)
-        query_time_ms = (time.time() - start_time) * 1000
-
-        formatted_results = []
-        for row in results:
-            formatted_row = {}
-            for var in results.vars:
-                value = row[var]
-                formatted_row[str(var)] = str(value) if value is not None else None
-            formatted_results.append(formatted_row)
+        start_ns = time.perf_counter_ns()
+        formatted_results = await cached_execute(rdf_service, sparql_request.query, output_format=sparql_request.output_format)
+        query_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        
+        if should_stream(formatted_results):
+            tail = b"}," + orjson.dumps({"query_time_ms": query_time_ms, "result_count": len(formatted_results)})[1:]
+            return StreamingResponse(
+                iter_json_array(formatted_results, head=b'{"results":{"bindings":', tail=tail),
+                media_type="application/json"
+            )
         
-        return SPARQLResult(
-            results={"bindings": formatted_results},
-            result_count=len(formatted_results),
-            query_time_ms=query_time_ms
-        )
+        # Plain dict straight to orjson; building a SPARQLResult would copy and re-validate every binding
+        return ORJSONResponse({
+            "results": {"bindings": formatted_results},
+            "query_time_ms": query_time_ms,
+            "result_count": len(formatted_results)
+        })
         
     except Exception as e:
         logger.error(f"Error executing SPARQL query: {e}")
@@ -3,263 +3,196 @@ Visualization API router
 Endpoints for generating visualization data
 """
 
+import asyncio
 import structlog
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import ORJSONResponse
 from app.services.external_data import GettyService
-from fastapi import APIRouter, HTTPException, Request, Query
+from app.deps import get_getty, require_admin
+from app.models import EntityId
+from app.http_cache import cache_headers, cached_json_response, etag_matches, graph_etag, not_modified
+from app.services.aggregate_cache import cached_aggregate, clear_aggregate_cache
+from app.services.sparql_cache import cached_execute
+from app.services.stats_aggregator import STATS_MAX_LIMIT
+from app.uris import ARTIST_URI_PREFIX
 
 logger = structlog.get_logger()
 router = APIRouter()
-getty = GettyService()
+
+# Locations with a Getty TGN link and their artwork counts, for the continent map
+LOCATION_MAP_QUERY = """
+PREFIX prov: <http://www.w3.org/ns/prov#>
+PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
+PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+
+SELECT ?location ?locationLabel ?locationTGN (COUNT(?artwork) AS ?artworks_count)
+WHERE {
+    ?location a prov:Location ;
+              owl:sameAs ?locationTGN .
+    ?location rdfs:label ?locationLabel .
+    FILTER(CONTAINS(STR(?locationTGN), "tgn"))
+
+    ?event crm:P7_took_place_at ?location ;
+           crm:P108_has_produced ?artwork .
+}
+GROUP BY ?location ?locationLabel ?locationTGN
+ORDER BY DESC(?artworks_count)
+"""
+
+# Getty TGN continent names (as they appear in gvp:parentString) -> map marker
+TGN_CONTINENTS = {
+    "Europe": "Europe",
+    "Asia": "Asia",
+    "Africa": "Africa",
+    "North and Central America": "North America",
+    "South America": "South America",
+    "Oceania": "Australia",
+}
+
+
+def continent_of(parent_string: str) -> Optional[str]:
+    """Map marker for a TGN parent string such as "Bucureşti, Romania, Europe, World".
+    
+    The continent is the last place before the "World" root, so it is one dict lookup
+    rather than a substring search that would also match names like "Central Europe".
+    """
+    
+    places = [place.strip() for place in parent_string.split(",")]
+    if places and places[-1] == "World":
+        places.pop()
+    return TGN_CONTINENTS.get(places[-1]) if places else None
+
+
+# Snapshot key -> (chart type, title) for the distribution charts; titles may mention the requested limit
+CHARTS = {
+    "by_type": ("pie", "Artworks by Type"),
+    "by_material": ("pie", "Artworks by Material"),
+    "top_artists": ("bar_horizontal", "Top {limit} Artists"),
+    "top_locations": ("bar_horizontal", "Top {limit} Locations"),
+}
+
+
+def chart(stats: Dict[str, Any], key: str, limit: int) -> Dict[str, Any]:
+    """Chart payload for one distribution, cut to the first `limit` groups"""
+    chart_type, title = CHARTS[key]
+    return {"chart_type": chart_type, "title": title.format(limit=limit), "data": stats[key][:limit]}
 
 
 @router.get("/statistics/overview")
 async def get_overview_statistics(request: Request) -> Dict[str, Any]:
     """Get overview statistics for dashboard"""
     
-    rdf_service = request.app.state.rdf_service
-    
-    query = """
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-
-    SELECT
-    ?total_artworks
-    ?total_artists
-    ?total_events
-    ?total_locations
-    WHERE {
-    {
-        SELECT (COUNT(DISTINCT ?artwork) AS ?total_artworks)
-        WHERE {
-        ?artwork a prov:Entity .
-        }
-    }
-    {
-        SELECT (COUNT(DISTINCT ?artist) AS ?total_artists)
-        WHERE {
-        ?artist a prov:Agent .
-        }
-    }
-    {
-        SELECT (COUNT(DISTINCT ?event) AS ?total_events)
-        WHERE {
-        ?event a prov:Activity .
-        }
-    }
-    {
-        SELECT (COUNT(DISTINCT ?location) AS ?total_locations)
-        WHERE {
-        ?location a prov:Location .
-        }
-    }
-    }
-    """
+    # The snapshot is rebuilt per graph generation, so the generation-based ETag can be checked before touching it
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        results = rdf_service.execute_sparql(query)
-        
-        stats = {
-            "total_artworks": 0,
-            "total_artists": 0,
-            "total_events": 0,
-            "total_locations": 0
-        }
-        
-        if results:
-            for row in results:
-                stats["total_artworks"] = int(row.total_artworks) if row.total_artworks else 0
-                stats["total_artists"] = int(row.total_artists) if row.total_artists else 0
-                stats["total_events"] = int(row.total_events) if row.total_events else 0
-                stats["total_locations"] = int(row.total_locations) if row.total_locations else 0
-                break 
-        
-        return stats
+        stats = await request.app.state.stats_service.get_stats()
+        # Snapshot data is plain str/int, so hand it straight to orjson and skip jsonable_encoder
+        return ORJSONResponse(stats["overview"], headers=cache_headers(etag))
         
     except Exception as e:
         logger.error(f"Error getting statistics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/statistics/by-type")
-async def get_artworks_by_type(request: Request, limit: int = Query(10, ge=1, le=50)):
+async def get_artworks_by_type(request: Request, limit: int = Query(10, ge=1, le=STATS_MAX_LIMIT)):
     """Get distribution of artworks by type"""
     
-    rdf_service = request.app.state.rdf_service
-    
-    query = f"""
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-    PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
-    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-    SELECT ?typeLabel (COUNT(?artwork) AS ?artwork_count)
-    WHERE {{
-        ?artwork a prov:Entity ;
-                crm:P2_has_type ?type .
-
-        ?type rdfs:label ?typeLabel .
-    }}
-    GROUP BY ?type ?typeLabel
-    ORDER BY DESC(?artwork_count)
-    LIMIT {limit}
-    """
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        results = rdf_service.execute_sparql(query)
-        
-        distribution = []
-        for row in results:
-            distribution.append({
-                "type": str(row.typeLabel),
-                "count": int(row.artwork_count)
-            })
-        
-        return {
-            "chart_type": "pie",
-            "title": "Artworks by Type",
-            "data": distribution
-        }
+        stats = await request.app.state.stats_service.get_stats()
+        return ORJSONResponse(chart(stats, "by_type", limit), headers=cache_headers(etag))
         
     except Exception as e:
         logger.error(f"Error getting artwork distribution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/statistics/by-material")
-async def get_artworks_by_material(request: Request, limit: int = Query(10, ge=1, le=50)):
+async def get_artworks_by_material(request: Request, limit: int = Query(10, ge=1, le=STATS_MAX_LIMIT)):
     """Get distribution of artworks by material"""
     
-    rdf_service = request.app.state.rdf_service
-    
-    query = f"""
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-    PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
-    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-    SELECT ?materialLabel (COUNT(?artwork) AS ?artwork_count)
-    WHERE {{
-        ?artwork a prov:Entity ;
-                crm:P45_consists_of ?material .
-
-        ?material rdfs:label ?materialLabel .
-        FILTER(?materialLabel != "Unknown")
-    }}
-    GROUP BY ?material ?materialLabel
-    ORDER BY DESC(?artwork_count)
-    LIMIT {limit}
-    """
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        results = rdf_service.execute_sparql(query)
-        
-        distribution = []
-        for row in results:
-            distribution.append({
-                "material": str(row.materialLabel),
-                "count": int(row.artwork_count)
-            })
-        
-        return {
-            "chart_type": "pie",
-            "title": "Artworks by Material",
-            "data": distribution
-        }
+        stats = await request.app.state.stats_service.get_stats()
+        return ORJSONResponse(chart(stats, "by_material", limit), headers=cache_headers(etag))
         
     except Exception as e:
         logger.error(f"Error getting artwork distribution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/statistics/top-artists")
-async def get_top_artists(request: Request, limit: int = Query(10, ge=1, le=50)):
+async def get_top_artists(request: Request, limit: int = Query(10, ge=1, le=STATS_MAX_LIMIT)):
     """Get top artists by number of artworks"""
     
-    rdf_service = request.app.state.rdf_service
-    
-    query = f"""
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-    PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
-    PREFIX foaf: <http://xmlns.com/foaf/0.1/>
-    
-    SELECT ?artist ?artistName (COUNT(?artwork) as ?artwork_count)
-    WHERE {{
-        ?event a crm:E12_Production ;
-               crm:P14_carried_out_by ?artist ;
-               crm:P108_has_produced ?artwork .
-        ?artist foaf:name ?artistName .
-        FILTER(?artistName != "Unknown Artist")
-    }}
-    GROUP BY ?artist ?artistName
-    ORDER BY DESC(?artwork_count)
-    LIMIT {limit}
-    """
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        results = rdf_service.execute_sparql(query)
-        
-        artists = []
-        for row in results:
-            artists.append({
-                "artist_uri": str(row.artist),
-                "name": str(row.artistName),
-                "artwork_count": int(row.artwork_count)
-            })
-        
-        return {
-            "chart_type": "bar_horizontal",
-            "title": f"Top {limit} Artists",
-            "data": artists
-        }
+        stats = await request.app.state.stats_service.get_stats()
+        return ORJSONResponse(chart(stats, "top_artists", limit), headers=cache_headers(etag))
         
     except Exception as e:
         logger.error(f"Error getting top artists: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/statistics/top-locations")
-async def get_top_locations(request: Request, limit: int = Query(10, ge=1, le=50)):
+async def get_top_locations(request: Request, limit: int = Query(10, ge=1, le=STATS_MAX_LIMIT)):
     """Get top locations by number of artworks"""
     
-    rdf_service = request.app.state.rdf_service
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    query = f"""
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-    PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
-    PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+    try:
+        stats = await request.app.state.stats_service.get_stats()
+        return ORJSONResponse(chart(stats, "top_locations", limit), headers=cache_headers(etag))
+        
+    except Exception as e:
+        logger.error(f"Error getting top locations: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/statistics/dashboard")
+async def get_dashboard_statistics(request: Request, limit: int = Query(10, ge=1, le=STATS_MAX_LIMIT)):
+    """Overview and every distribution chart in one response, for pages that show them all together"""
     
-    SELECT ?location ?locationName (COUNT(?artwork) as ?artwork_count)
-    WHERE {{
-        ?event a crm:E12_Production ;
-               crm:P7_took_place_at ?location ;
-               crm:P108_has_produced ?artwork .
-        ?location foaf:name ?locationName .
-        FILTER(?locationName != "Unknown Location")
-    }}
-    GROUP BY ?location ?locationName
-    ORDER BY DESC(?artwork_count)
-    LIMIT {limit}
-    """
+    etag = graph_etag(request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     try:
-        results = rdf_service.execute_sparql(query)
-        
-        locations = []
-        for row in results:
-            locations.append({
-                "location_uri": str(row.location),
-                "name": str(row.locationName),
-                "artwork_count": int(row.artwork_count)
-            })
-        
-        return {
-            "chart_type": "bar_horizontal",
-            "title": f"Top {limit} Locations",
-            "data": locations
-        }
+        stats = await request.app.state.stats_service.get_stats()
+        return ORJSONResponse({
+            "overview": stats["overview"],
+            **{key: chart(stats, key, limit) for key in CHARTS}
+        }, headers=cache_headers(etag))
         
     except Exception as e:
-        logger.error(f"Error getting top locations: {e}")
+        logger.error(f"Error getting dashboard statistics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/map/locations")
-async def get_location_map(request: Request):
+async def get_location_map(request: Request, getty: GettyService = Depends(get_getty)):
     """Get map visualization data for artwork locations"""
     
+    # The continents come from Getty lookups as well as the graph, so the ETag is a digest of the body:
+    # a map built while Getty was failing must not be pinned by 304s until the graph changes
+    location_map = await build_location_map(request=request, getty=getty)
+    return cached_json_response(request, location_map)
+
+@cached_aggregate
+async def build_location_map(request: Request, getty: GettyService) -> Dict[str, Any]:
+    """Continent markers with the number of artworks from locations on each continent"""
+    
     rdf_service = request.app.state.rdf_service
 
     continents = {
@@ -289,42 +222,27 @@ async def get_location_map(request: Request):
         }
     }
     
-    query = """
-    PREFIX prov: <http://www.w3.org/ns/prov#>
-    PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
-    PREFIX owl:  <http://www.w3.org/2002/07/owl#>
-    
-    SELECT ?location ?locationLabel ?locationTGN (COUNT(?artwork) AS ?artworks_count)
-    WHERE {
-        ?location a prov:Location ;
-                  owl:sameAs ?locationTGN .
-        ?location rdfs:label ?locationLabel .
-        FILTER(CONTAINS(STR(?locationTGN), "tgn"))
-        
-        ?event crm:P7_took_place_at ?location ;
-               crm:P108_has_produced ?artwork .
-    }
-    GROUP BY ?location ?locationLabel ?locationTGN
-    ORDER BY DESC(?artworks_count)
-    LIMIT 1
-    """
-    
     try:
-        results = rdf_service.execute_sparql(query)
+        # Runs (and materialises the rows) in a worker thread, so the query doesn't hold up the event loop
+        results = await cached_execute(rdf_service, LOCATION_MAP_QUERY)
+        rows = [row for row in results if row["artworks_count"] is not None]
         
-        for row in results:
-            location_label = str(row.locationLabel)
-            location_getty = str(row.locationTGN)
-            artworks_count = int(row.artworks_count)
+        # Look up every distinct TGN parent at once instead of one Getty round-trip per row
+        tgn_links = list({row["locationTGN"] for row in rows})
+        parents = await asyncio.gather(*(getty.get_location_parent(link) for link in tgn_links), return_exceptions=True)
+        broader_locations = dict(zip(tgn_links, parents))
+        
+        for row in rows:
+            location_getty = row["locationTGN"]
+            artworks_count = int(row["artworks_count"])
 
-            logger.debug(f"Processing location: {location_label}, {location_getty} with {artworks_count} artworks")
+            logger.debug(f"Processing location: {row['locationLabel']}, {location_getty} with {artworks_count} artworks")
             
-            broader_location = await getty.get_location_parent(location_getty)
-            if broader_location:
-                for continent in continents:
-                    if continent in broader_location:
-                        continents[continent]["artworks_count"] += artworks_count
-                        break
+            broader_location = broader_locations[location_getty]
+            if isinstance(broader_location, str):
+                continent = continent_of(broader_location)
+                if continent:
+                    continents[continent]["artworks_count"] += artworks_count
 
         return {
             "map_type": "markers",
@@ -337,14 +255,14 @@ async def get_location_map(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/statistics/network/artists/{artist_id}")
-async def get_network_artists(request: Request, artist_id: str):
+async def get_network_artists(request: Request, artist_id: EntityId, getty: GettyService = Depends(get_getty)):
     """ Get network of artists connected to a specific artist by student_of/teacher_of relationships """
     
     rdf_service = request.app.state.rdf_service
-    artist_uri = f"http://arp-greatteam.org/heritage-provenance/artist/{artist_id}"
+    artist_uri = ARTIST_URI_PREFIX + artist_id
 
     try:
-        artist_data = rdf_service.get_artist(artist_uri)
+        artist_data = await asyncio.to_thread(rdf_service.get_artist, artist_uri)
 
         if artist_data is None or artist_data.get('getty') is None:
             return {"message": "No Getty link available for this artist."}
@@ -354,15 +272,30 @@ async def get_network_artists(request: Request, artist_id: str):
         network = await getty.get_artist_network(artist_data['getty'])
         if network == {}:
             return {"message": "No network data available from Getty for this artist."}
-        network["nodes"].append({
-            "id": artist_data['getty'].split("/")[-1],
-            "uri": artist_data['getty'],
-            "name": artist_data['name']
+        return ORJSONResponse({
+            **network,
+            "nodes": network["nodes"] + [{
+                "id": artist_data['getty'].split("/")[-1],
+                "uri": artist_data['getty'],
+                "name": artist_data['name']
+            }]
         })
-        return network 
         
     
     except Exception as e:
         logger.error(f"Error retrieving artist network for {artist_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cache/clear", dependencies=[Depends(require_admin)])
+async def clear_visualization_cache():
+    """Drop cached statistics so the next dashboard load recomputes them (e.g. after an out-of-band data import)"""
+    return {"cleared": clear_aggregate_cache()}
+
+
+@router.post("/statistics/refresh", dependencies=[Depends(require_admin)])
+async def refresh_statistics(request: Request):
+    """Recompute the pre-aggregated dashboard statistics now instead of on the next graph change"""
     
+    stats = await request.app.state.stats_service.refresh()
+    return {"refreshed": list(stats)}
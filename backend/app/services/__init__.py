@@ -2,6 +2,7 @@
 
 from .helpers import (
     wikidata_parser_for_artist,
+    wikidata_parser_for_artist_binding,
     wikidata_parser_for_artwork,
     format_wikidata_date,
     format_getty_network_artists
@@ -9,6 +10,7 @@ from .helpers import (
 
 __all__ = [
     'wikidata_parser_for_artist',
+    'wikidata_parser_for_artist_binding',
     'wikidata_parser_for_artwork',
     'format_wikidata_date',
     'format_getty_network_artists'
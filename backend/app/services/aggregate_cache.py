@@ -0,0 +1,60 @@
+"""
+Response cache for dashboard aggregate endpoints
+Statistics are recomputed at most once per graph generation and TTL, however many tiles ask for them
+"""
+
+import asyncio
+import functools
+import structlog
+from typing import Dict
+from cachetools import TTLCache
+from app.config import settings
+
+logger = structlog.get_logger()
+
+aggregate_cache = TTLCache(maxsize=settings.AGGREGATE_CACHE_SIZE, ttl=settings.AGGREGATE_CACHE_TTL)
+_key_locks: Dict[tuple, asyncio.Lock] = {}
+
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+def cached_aggregate(func):
+    """Cache the result of an aggregate endpoint, keyed by endpoint, query parameters and graph generation.
+    
+    Only plain query parameters are part of the key; the request and injected services are not.
+    Concurrent misses for the same key wait on one lock, so the aggregate query runs once.
+    Cached values are shared between callers and must not be mutated.
+    """
+    
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        request = kwargs["request"]
+        params = tuple(sorted((name, value) for name, value in kwargs.items() if isinstance(value, _KEY_TYPES)))
+        key = (func.__name__, params, request.app.state.rdf_service.generation)
+        
+        try:
+            return aggregate_cache[key]
+        except KeyError:
+            pass
+        
+        lock = _key_locks.setdefault(key[:2], asyncio.Lock())
+        async with lock:
+            try:
+                return aggregate_cache[key]
+            except KeyError:
+                pass
+            
+            result = await func(*args, **kwargs)
+            aggregate_cache[key] = result
+            return result
+    
+    return wrapper
+
+
+def clear_aggregate_cache() -> int:
+    """Drop every cached aggregate response and return how many there were"""
+    
+    count = len(aggregate_cache)
+    aggregate_cache.clear()
+    logger.info(f"Cleared {count} cached aggregate responses")
+    return count
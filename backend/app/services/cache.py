@@ -0,0 +1,137 @@
+"""
+In-process caching for slow external lookups
+Results are kept in a TTL cache shared by every decorated service method, and can be saved to disk across restarts.
+Entries expire a fixed time after they were fetched, however many restarts they are carried over.
+"""
+
+import asyncio
+import functools
+import os
+import tempfile
+import time
+import orjson
+import structlog
+from typing import Dict
+from cachetools import TLRUCache
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+def _expires(key, entry, now) -> float:
+    """Entries are (fetched_at, result) on the wall clock, so an entry restored from disk keeps its original deadline"""
+    return entry[0] + settings.EXTERNAL_CACHE_TTL
+
+
+external_cache = TLRUCache(maxsize=settings.EXTERNAL_CACHE_SIZE, ttu=_expires, timer=time.time)
+
+# Bumped when the layout of the saved file changes; files in another format are ignored
+CACHE_FILE_VERSION = 2
+
+# Lookups currently being fetched, by cache key, so concurrent misses for the same key share one upstream request
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+
+def _freeze(value):
+    """Turn list arguments into tuples so they can be part of a cache key"""
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def cached(prefix: str):
+    """Cache the result of an async service method, keyed by prefix and call arguments.
+    
+    Empty results (None, {}) are not stored, so failed lookups are retried on the next call.
+    Cached values are shared between callers and must not be mutated.
+    Callers that miss while the same lookup is already running wait for it instead of starting another.
+    """
+    
+    def decorator(func):
+        async def fetch(key, self, args, kwargs):
+            result = await func(self, *args, **kwargs)
+            if result:
+                external_cache[key] = (time.time(), result)
+            return result
+        
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (prefix, tuple(_freeze(arg) for arg in args), tuple(sorted(kwargs.items())))
+            
+            try:
+                return external_cache[key][1]
+            except KeyError:
+                pass
+            
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fetch(key, self, args, kwargs))
+                _inflight[key] = task
+                task.add_done_callback(lambda done: _inflight.pop(key, None))
+            
+            # Shielded so a caller that goes away does not cancel the lookup for the others waiting on it
+            return await asyncio.shield(task)
+        
+        return wrapper
+    
+    return decorator
+
+
+def save_external_cache(path: str) -> int:
+    """Write the cached lookups to a JSON file and return how many were saved"""
+    
+    entries = [
+        [prefix, list(args), [list(item) for item in kwargs], fetched_at, value]
+        for (prefix, args, kwargs), (fetched_at, value) in list(external_cache.items())
+    ]
+    
+    tmp_path = None
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # A temporary file per writer, so workers shutting down together don't write over each other's file
+        with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=".external_cache.", suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            f.write(orjson.dumps({"version": CACHE_FILE_VERSION, "saved_at": time.time(), "entries": entries}))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving external cache to {path}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return 0
+    
+    logger.info(f"Saved {len(entries)} external lookups to {path}")
+    return len(entries)
+
+
+def load_external_cache(path: str) -> int:
+    """Load lookups saved by save_external_cache and return how many were restored.
+    
+    Entries keep the time they were fetched, so those older than the TTL are skipped and the rest expire on schedule.
+    """
+    
+    if not os.path.exists(path):
+        return 0
+    
+    restored = 0
+    try:
+        with open(path, "rb") as f:
+            payload = orjson.loads(f.read())
+        
+        if payload.get("version") != CACHE_FILE_VERSION:
+            logger.info(f"External cache file {path} has an older format, ignoring it")
+            return 0
+        
+        now = time.time()
+        for prefix, args, kwargs, fetched_at, value in payload["entries"]:
+            if now - fetched_at >= settings.EXTERNAL_CACHE_TTL:
+                continue
+            key = (prefix, tuple(_freeze(arg) for arg in args), tuple((name, _freeze(arg)) for name, arg in kwargs))
+            external_cache[key] = (fetched_at, value)
+            restored += 1
+    except Exception as e:
+        logger.error(f"Error loading external cache from {path}: {e}")
+        return restored
+    
+    logger.info(f"Restored {restored} of {len(payload['entries'])} external lookups from {path}")
+    return restored
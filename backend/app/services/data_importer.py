@@ -3,15 +3,132 @@ Data importer service for loading external datasets
 Supports Romanian heritage data (INP), Europeana EDM, and other formats
 """
 
+import hashlib
+import io
+import shutil
+import tempfile
 import requests
 import structlog
-from uuid import uuid4
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
 import xml.etree.ElementTree as ET
+from app.uris import ARTIST_URI_PREFIX, ARTWORK_URI_PREFIX, LOCATION_URI_PREFIX, EVENT_URI_PREFIX, ATTRIBUTE_URI_PREFIX
 
 logger = structlog.get_logger()
 
-base_uri = "http://arp-greatteam.org/heritage-provenance/"
+RDF_ABOUT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about'
+RDF_RESOURCE = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource'
+EDM_PROVIDED_CHO = '{http://www.europeana.eu/schemas/edm/}ProvidedCHO'
+ORE_AGGREGATION = '{http://www.openarchives.org/ore/terms/}Aggregation'
+EDM_AGGREGATED_CHO = '{http://www.europeana.eu/schemas/edm/}aggregatedCHO'
+
+# Record fields read by the importer, as fully qualified ElementTree tags
+DC_IDENTIFIER = '{http://purl.org/dc/elements/1.1/}identifier'
+DC_TITLE = '{http://purl.org/dc/elements/1.1/}title'
+DC_DESCRIPTION = '{http://purl.org/dc/elements/1.1/}description'
+DC_CREATOR = '{http://purl.org/dc/elements/1.1/}creator'
+DC_TYPE = '{http://purl.org/dc/elements/1.1/}type'
+DC_SUBJECT = '{http://purl.org/dc/elements/1.1/}subject'
+DCTERMS_SPATIAL = '{http://purl.org/dc/terms/}spatial'
+DCTERMS_MEDIUM = '{http://purl.org/dc/terms/}medium'
+DCTERMS_CREATED = '{http://purl.org/dc/terms/}created'
+DCTERMS_EXTENT = '{http://purl.org/dc/terms/}extent'
+EDM_PROVIDER = '{http://www.europeana.eu/schemas/edm/}provider'
+EDM_DATA_PROVIDER = '{http://www.europeana.eu/schemas/edm/}dataProvider'
+EDM_IS_SHOWN_BY = '{http://www.europeana.eu/schemas/edm/}isShownBy'
+
+
+def _mint_uri(prefix: str, *key) -> str:
+    """URI for a resource derived from its natural key, so importing the same record again yields the same URIs"""
+    
+    digest = hashlib.blake2b("\x1f".join(part or "" for part in key).encode("utf-8"), digest_size=11).hexdigest()
+    return prefix + digest
+
+
+def _iter_elements(source, tag: str):
+    """Yield every `tag` element of an XML document (a binary file object) as soon as it has been parsed.
+    
+    Top-level elements are dropped from the tree once they are finished, so memory stays bounded by the
+    largest record instead of growing with the whole document. Yielded elements stay usable after that.
+    """
+    
+    root = None
+    depth = 0
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+        
+        depth -= 1
+        if element.tag == tag:
+            yield element
+        if depth == 1:
+            root.clear()
+
+
+def _index_by_tag(element):
+    """Group an element's direct children and all of its descendants by tag, in document order.
+    
+    Every field of a record is then a dict lookup instead of a separate ElementPath search over the record.
+    """
+    
+    children, descendants = {}, {}
+    for child in element:
+        children.setdefault(child.tag, []).append(child)
+        # child.iter() starts with the child itself, so this is one pre-order walk of the record
+        for descendant in child.iter():
+            descendants.setdefault(descendant.tag, []).append(descendant)
+    return children, descendants
+
+
+# Field readers over an _index_by_tag result: _get_attr searches all descendants (like './/ns:tag'),
+# _get_text only direct children (like 'ns:tag')
+def _get_attr(indexed, tag: str):
+    """First rdf:resource link on a `tag` element anywhere in the record"""
+    for el in indexed[1].get(tag, ()):
+        val = el.get(RDF_RESOURCE)
+        if val:
+            return val
+    return None
+
+
+def _get_text(indexed, tag: str) -> str:
+    """Text of the record's `tag` children, space-joined"""
+    return " ".join([e.text for e in indexed[0].get(tag, ()) if e.text])
+
+
+# Downloads go through one pooled session, so importing several dumps from a provider reuses its connections
+_http = requests.Session()
+_http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# (connect, read) timeouts for downloads; the read timeout applies between chunks, not to the whole body
+DOWNLOAD_TIMEOUT = (5, 300)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class _RecordBatch:
+    """Triples for one imported record, written with a single add_batch call.
+    
+    Artists, locations and entities created for the record are registered in the importer's lookups
+    right away (a record can reuse them), and are forgotten again if the record is not written.
+    This only undoes the lookups; add_batch writes nothing for a batch with a bad term.
+    """
+    
+    def __init__(self):
+        self.triples = []
+        self.created = []  # (lookup dict, key)
+    
+    def create(self, lookup: Dict, key, uri: str, triples):
+        self.triples.extend(triples)
+        lookup[key] = uri
+        self.created.append((lookup, key))
+    
+    def forget_created(self):
+        for lookup, key in self.created:
+            lookup.pop(key, None)
 
 
 class DataImporter:
@@ -27,14 +144,18 @@ class DataImporter:
         """Download and import data from URL"""
         
         try:
-            logger.info(f"Downloading data from: {url}")
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            if format == "edm":
-                return self.import_edm_xml(response.content)
-            else:
+            if format != "edm":
                 raise ValueError(f"Unsupported format: {format}")
+            
+            logger.info(f"Downloading data from: {url}")
+            # The body is streamed to a temporary file instead of being held in memory; the import
+            # reads it twice, which a network stream cannot do
+            with _http.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response, tempfile.TemporaryFile() as dump:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, dump, DOWNLOAD_CHUNK_SIZE)
+                dump.seek(0)
+                return self.import_edm_stream(dump)
                 
         except Exception as e:
             logger.error(f"Error importing from URL: {e}")
@@ -42,49 +163,48 @@ class DataImporter:
     
     def import_edm_xml(self, xml_content: bytes) -> Dict[str, Any]:
         """Import Europeana Data Model XML"""
+        return self.import_edm_stream(io.BytesIO(xml_content))
+    
+    def import_edm_stream(self, fp) -> Dict[str, Any]:
+        """Import Europeana Data Model XML from a seekable binary file object"""
         try:
-            root = ET.fromstring(xml_content)
-            
-            ns = {
-                'edm': "http://www.europeana.eu/schemas/edm/",
-                'dc': "http://purl.org/dc/elements/1.1/",
-                'ore': "http://www.openarchives.org/ore/terms/",
-                'dcterms': "http://purl.org/dc/terms/",
-                'rdf': "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
-            }
-            
             errors = []
             imported_count = 0
+            # Artists, locations and entities are reported as totals once the import is done, not one log line each
+            known = len(self.created_artists), len(self.created_locations), len(self.created_entities)
 
+            # Two streaming passes: an aggregation may come before or after the object it describes,
+            # so the (small) aggregations are collected first and the objects are imported as they are read
             aggregations = {}
-            for agg in root.findall('.//ore:Aggregation', ns):
-                aggregated_cho = agg.find('edm:aggregatedCHO', ns)
+            start = fp.tell()
+            for agg in _iter_elements(fp, ORE_AGGREGATION):
+                aggregated_cho = agg.find(EDM_AGGREGATED_CHO)
                 if aggregated_cho is not None:
-                    cho_id = aggregated_cho.get('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource')
-                    aggregations[cho_id] = agg
-
-            for artwork in root.findall('.//edm:ProvidedCHO', ns):
-                artwork_id = artwork.get('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about')
-                aggregation = aggregations.get(artwork_id)
+                    aggregations[aggregated_cho.get(RDF_RESOURCE)] = agg
 
+            fp.seek(start)
+            for artwork in _iter_elements(fp, EDM_PROVIDED_CHO):
                 try:
-                
-                    if aggregation:
-                        success = self._parse_edm_cho(artwork, aggregation, ns)
-                    else:
-                        success = self._parse_edm_cho(artwork, None, ns)
-                    
-                    if success:
+                    if self._parse_edm_cho(artwork, aggregations.get(artwork.get(RDF_ABOUT))):
                         imported_count += 1
                     else:
-                        errors.append(f"Failed to import artwork with identifier: {artwork.find('dc:identifier', ns).text if artwork.find('dc:identifier', ns) is not None else 'unknown'}")
+                        identifier = artwork.find(DC_IDENTIFIER)
+                        errors.append(f"Failed to import artwork with identifier: {identifier.text if identifier is not None else 'unknown'}")
             
                 except Exception as e:   
                     errors.append(f"Exception: {str(e)}")
                     logger.warning(f"Error processing Artworks: {e}")
                     
                 
-            logger.info(f"Imported {imported_count} artworks from EDM XML")
+            new_artists, new_locations, new_entities = (
+                len(self.created_artists) - known[0],
+                len(self.created_locations) - known[1],
+                len(self.created_entities) - known[2]
+            )
+            logger.info(
+                f"Imported {imported_count} artworks from EDM XML "
+                f"({new_artists} new artists, {new_locations} new locations, {new_entities} new entities)"
+            )
             
             return {
                 "imported": imported_count,
@@ -96,99 +216,91 @@ class DataImporter:
             logger.error(f"Error parsing EDM XML: {e}")
             raise
     
-    def _find_or_create_artist(self, creator_name: str, creator_ulan: str = None) -> str:
+    def _find_or_create_artist(self, batch: _RecordBatch, creator_name: str, creator_ulan: str = None) -> str:
         """Find existing artist or create new one"""
         if not creator_name:
             creator_name = "Unknown Artist"
         
-        if creator_name in self.created_artists:
-            logger.debug(f"Reusing existing artist: {creator_name}")
-            return self.created_artists[creator_name]
+        artist_uri = self.created_artists.get(creator_name)
+        if artist_uri is not None:
+            return artist_uri
         
-        artist_id = str(uuid4())
-        artist_uri = f"{base_uri}artist/{artist_id}"
+        artist_uri = _mint_uri(ARTIST_URI_PREFIX, creator_name)
         artist_data = {
             'creator': creator_name,
             'creatorULAN': creator_ulan
         }
         
-        if self.rdf_service.add_artist(artist_uri, artist_data):
-            self.created_artists[creator_name] = artist_uri
-            logger.info(f"Created new artist: {creator_name}")
-            return artist_uri
-        
-        return None
+        batch.create(self.created_artists, creator_name, artist_uri, self.rdf_service.artist_triples(artist_uri, artist_data))
+        return artist_uri
     
-    def _find_or_create_location(self, location_name: str, location_tgn: str = None) -> str:
+    def _find_or_create_location(self, batch: _RecordBatch, location_name: str, location_tgn: str = None) -> str:
         """Find existing location or create new one"""
         
         if not location_name:
             location_name = "Unknown Location"
         
-        if location_name in self.created_locations:
-            logger.debug(f"Reusing existing location: {location_name}")
-            return self.created_locations[location_name]
+        location_uri = self.created_locations.get(location_name)
+        if location_uri is not None:
+            return location_uri
         
-        location_id = str(uuid4())
-        location_uri = f"{base_uri}location/{location_id}"
+        location_uri = _mint_uri(LOCATION_URI_PREFIX, location_name)
         location_data = {
             'location': location_name,
             'locationTGN': location_tgn
         }
         
-        if self.rdf_service.add_location(location_uri, location_data):
-            self.created_locations[location_name] = location_uri
-            logger.info(f"Created new location: {location_name}")
-            return location_uri
-        
-        return None
+        batch.create(self.created_locations, location_name, location_uri, self.rdf_service.location_triples(location_uri, location_data))
+        return location_uri
     
-    def _find_or_create_entity(self, entity_type: str, name: str, link: str = None) -> str:
+    def _find_or_create_entity(self, batch: _RecordBatch, entity_type: str, name: str, link: str = None) -> str:
         if not name:
             name = "Unknown"
         
         entity_key = name, link
         
-        if entity_key in self.created_entities:
-            logger.debug(f"Reusing existing entity: {entity_key}")
-            return self.created_entities[entity_key]
-        
-        entity_id = str(uuid4())
-        entity_uri = f"{base_uri}attributes/{entity_id}"
-        
-        if self.rdf_service.add_entity(entity_type, entity_uri, name, link):
-            self.created_entities[entity_key] = entity_uri
-            logger.info(f"Created new entity: {entity_key}")
+        entity_uri = self.created_entities.get(entity_key)
+        if entity_uri is not None:
             return entity_uri
         
-        return None
+        entity_uri = _mint_uri(ATTRIBUTE_URI_PREFIX, name, link)
+        
+        batch.create(self.created_entities, entity_key, entity_uri, self.rdf_service.entity_triples(entity_type, entity_uri, name, link))
+        return entity_uri
         
 
-    def _parse_edm_cho(self, cho_element, agg, namespaces: Dict[str, str]) -> bool:
+    def _parse_edm_cho(self, cho_element, agg) -> bool:
         """Parse a single EDM ProvidedCHO element (ARTWORK) with all additional information"""
         
-        def get_attr(element, tag, ns_key='dc'):
-            for el in element.findall(f'.//{ns_key}:{tag}', namespaces):
-                val = el.get('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource')
-                if val:
-                    return val
-            return None
+        batch = _RecordBatch()
+        try:
+            if not self._collect_edm_cho(batch, cho_element, agg):
+                return False
+            if self.rdf_service.add_batch(batch.triples):
+                return True
+        except Exception:
+            batch.forget_created()
+            raise
         
-        def get_text(element, tag, ns_key='dc'):
-            return " ".join([e.text for e in element.findall(f'{ns_key}:{tag}', namespaces) if e.text])
+        batch.forget_created()
+        return False
+
+    def _collect_edm_cho(self, batch: _RecordBatch, cho_element, agg) -> bool:
+        """Gather the triples for one ProvidedCHO into the batch; False if the record has no inventory number"""
         
+        cho = _index_by_tag(cho_element)
 
-        inventoryNumber = get_text(cho_element, 'identifier', 'dc')
+        inventoryNumber = _get_text(cho, DC_IDENTIFIER)
         if not inventoryNumber:
             return False
         
-        creator_name = get_text(cho_element, 'creator', 'dc')
-        creator_ulan = get_attr(cho_element, 'creator', 'dc')
-        artist_uri = self._find_or_create_artist(creator_name, creator_ulan)
+        creator_name = _get_text(cho, DC_CREATOR)
+        creator_ulan = _get_attr(cho, DC_CREATOR)
+        artist_uri = self._find_or_create_artist(batch, creator_name, creator_ulan)
         
         # location - prefer "țară de proveniență: " or fallback to first spatial
         location_name = None
-        spatial_elements = cho_element.findall('dcterms:spatial', namespaces)
+        spatial_elements = cho[0].get(DCTERMS_SPATIAL, [])
         for el in spatial_elements:
             if el.text and "țară de proveniență: " in el.text:
                 location_name = el.text.replace("țară de proveniență: ", "").strip()
@@ -198,68 +310,67 @@ class DataImporter:
             if first_text:
                 location_name = first_text.split(": ", 1)[-1].strip()
         
-        location_tgn = get_attr(cho_element, 'spatial', 'dcterms')
-        location_uri = self._find_or_create_location(location_name, location_tgn)
+        location_tgn = _get_attr(cho, DCTERMS_SPATIAL)
+        location_uri = self._find_or_create_location(batch, location_name, location_tgn)
 
 
 
-        type_name = get_text(cho_element, 'type', 'dc')
-        type_aat = get_attr(cho_element, 'type', 'dc')
-        type_uri = self._find_or_create_entity('type', type_name, type_aat)
+        type_name = _get_text(cho, DC_TYPE)
+        type_aat = _get_attr(cho, DC_TYPE)
+        type_uri = self._find_or_create_entity(batch, 'type', type_name, type_aat)
 
-        subject_name = get_text(cho_element, 'subject', 'dc')
-        subject_aat = get_attr(cho_element, 'subject', 'dc')
-        subject_uri = self._find_or_create_entity('subject', subject_name, subject_aat)
+        subject_name = _get_text(cho, DC_SUBJECT)
+        subject_aat = _get_attr(cho, DC_SUBJECT)
+        subject_uri = self._find_or_create_entity(batch, 'subject', subject_name, subject_aat)
         
-        material_name = get_text(cho_element, 'medium', 'dcterms')
-        material_aat = get_attr(cho_element, 'medium', 'dcterms')
-        material_uri = self._find_or_create_entity('material', material_name, material_aat)
+        material_name = _get_text(cho, DCTERMS_MEDIUM)
+        material_aat = _get_attr(cho, DCTERMS_MEDIUM)
+        material_uri = self._find_or_create_entity(batch, 'material', material_name, material_aat)
         
         image_url = None
         provider_wikidata_link = None
         institute_name = None
         
         if agg is not None:
-            provider_wikidata_link = get_attr(agg, 'provider', 'edm')
-            institute_name = get_text(agg, 'dataProvider', 'edm')
-            image_url = get_attr(agg, 'isShownBy', 'edm')
+            aggregation = _index_by_tag(agg)
+            provider_wikidata_link = _get_attr(aggregation, EDM_PROVIDER)
+            institute_name = _get_text(aggregation, EDM_DATA_PROVIDER)
+            image_url = _get_attr(aggregation, EDM_IS_SHOWN_BY)
 
-        provider_uri = self._find_or_create_entity('provider', "", provider_wikidata_link) if provider_wikidata_link else None
-        institute_uri = self._find_or_create_entity('institute', institute_name, None) if institute_name else None
+        provider_uri = self._find_or_create_entity(batch, 'provider', "", provider_wikidata_link) if provider_wikidata_link else None
+        institute_uri = self._find_or_create_entity(batch, 'institute', institute_name, None) if institute_name else None
 
 
 
-        artwork_id = str(uuid4())
-        artwork_uri = f"{base_uri}artwork/{artwork_id}"
+        creation_date = _get_text(cho, DCTERMS_CREATED)
+        
+        # rdf:about identifies the record in the source; the inventory number is the fallback key
+        artwork_uri = _mint_uri(ARTWORK_URI_PREFIX, cho_element.get(RDF_ABOUT) or inventoryNumber)
         artwork_data = {
             'inventoryNumber': inventoryNumber,
-            'title': get_text(cho_element, 'title', 'dc'),
-            'description': get_text(cho_element, 'description', 'dc'),
-            'creationDate': get_text(cho_element, 'created', 'dcterms'),
-            'dimensions': get_text(cho_element, 'extent', 'dcterms'),
+            'title': _get_text(cho, DC_TITLE),
+            'description': _get_text(cho, DC_DESCRIPTION),
+            'creationDate': creation_date,
+            'dimensions': _get_text(cho, DCTERMS_EXTENT),
             'imageURL': image_url,
             'type_uri': type_uri,
             'subject_uri': subject_uri,
             'material_uri': material_uri
         }
-        success_artwork = self.rdf_service.add_artwork(artwork_uri, artwork_data)
-        
-        if not success_artwork:
-            return False
+        batch.triples.extend(self.rdf_service.artwork_triples(artwork_uri, artwork_data))
         
         if artist_uri and location_uri:
-            event_id = str(uuid4())
-            event_uri = f"{base_uri}event/{event_id}"
+            event_uri = _mint_uri(EVENT_URI_PREFIX, 'creation', artwork_uri)
             event_data = {
                 'type': 'creation',
                 'artwork_uri': artwork_uri,
                 'artist_uri': artist_uri,
                 'location_uri': location_uri,
-                'date': get_text(cho_element, 'created', 'dcterms'),
+                'date': creation_date,
                 'provider_uri': provider_uri,
                 'institute_uri': institute_uri
             }
             
-            self.rdf_service.add_provenance_event(event_uri, event_data)
+            batch.triples.extend(self.rdf_service.provenance_event_triples(event_uri, event_data))
         
         return True
@@ -3,25 +3,29 @@ External data integration services
 Integrates with Wikidata, Getty, and Romanian heritage sources
 """
 
+import asyncio
 import httpx
-import aiohttp
 import structlog
 from app.config import settings
+from app.services.cache import cached
 from typing import Dict, Any, List, Optional
-from SPARQLWrapper import SPARQLWrapper, JSON
 
 
 logger = structlog.get_logger()
 
+WBGETENTITIES_MAX_IDS = 50
+
 
 class WikidataService:
     """Service for querying Wikidata"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client if client is not None else httpx.AsyncClient()
         self.headers = {
             'User-Agent': 'HeritageProvenanceSystem/1.0 (https://github.com/onfma/Artwork-Provenance; contact@yahoo.com)'
         }
 
+    @cached(prefix="wd:search")
     async def search_wikidata(self, search_term):
         """Search Wikidata entities"""
         
@@ -34,47 +38,133 @@ class WikidataService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, headers=self.headers, timeout=10.0)
-                response.raise_for_status()
-                results = response.json()
-                
-                return results
+            response = await self.client.get(url, params=params, headers=self.headers, timeout=10.0)
+            response.raise_for_status()
+            results = response.json()
+            
+            return results
         
         except Exception as e:
             logger.error(f"HTTP error querying Wikidata API: {e}")
             return None
     
+    @cached(prefix="wd:entity")
     async def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
         """Get entity details from Wikidata by ID"""
         url = "https://www.wikidata.org/wiki/Special:EntityData/{}.json".format(entity_id)
     
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=10.0)
-                response.raise_for_status()
-                return response.json()
+            response = await self.client.get(url, headers=self.headers, timeout=10.0)
+            response.raise_for_status()
+            return response.json()
         
         except Exception as e:
             logger.error(f"HTTP error getting Wikidata entity {entity_id}: {e}")
             return None
     
-    async def get_entity_label(self, entity_id: str) -> Optional[str]:
-        """Get the label (name) for a Wikidata entity by ID"""
+    @cached(prefix="wd:entities")
+    async def get_entities(self, entity_ids: List[str]) -> Dict[str, Any]:
+        """Get several entities in as few requests as possible (wbgetentities accepts up to 50 IDs per call)"""
+        
+        entities = await self._get_entities(entity_ids, {'props': 'labels|descriptions|claims', 'languages': 'en|ro'})
+        return {'entities': entities} if entities else {}
+    
+    @cached(prefix="wd:labels")
+    async def get_entity_labels(self, entity_ids: List[str]) -> Dict[str, str]:
+        """Label of each entity (Romanian, else English, else any language), fetched as labels only in batches of 50"""
+        
+        labels = {}
+        for entity_id, entity_data in (await self._get_entities(entity_ids, {'props': 'labels'})).items():
+            entity_labels = entity_data.get('labels', {})
+            label = entity_labels.get('ro') or entity_labels.get('en') or next(iter(entity_labels.values()), None)
+            if label:
+                labels[entity_id] = label['value']
+        
+        return labels
+    
+    async def _get_entities(self, entity_ids: List[str], params: Dict[str, str]) -> Dict[str, Any]:
+        """wbgetentities over chunks of WBGETENTITIES_MAX_IDS IDs, requested concurrently; failed chunks are left out"""
+        
+        url = "https://www.wikidata.org/w/api.php"
+        chunks = [entity_ids[i:i + WBGETENTITIES_MAX_IDS] for i in range(0, len(entity_ids), WBGETENTITIES_MAX_IDS)]
+        
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Any]:
+            chunk_params = {
+                'action': 'wbgetentities',
+                'format': 'json',
+                'ids': '|'.join(chunk),
+                **params
+            }
+            try:
+                response = await self.client.get(url, params=chunk_params, headers=self.headers, timeout=10.0)
+                response.raise_for_status()
+                return response.json().get('entities', {})
+            except Exception as e:
+                logger.error(f"HTTP error getting Wikidata entities {chunk}: {e}")
+                return {}
+        
+        entities = {}
+        for chunk_entities in await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks]):
+            entities.update(chunk_entities)
+        
+        return entities
+    
+    @cached(prefix="wd:sparql_lookup")
+    async def sparql_lookup(self, search_term: str) -> Optional[Dict[str, Any]]:
+        """Find the best entity match for a name (or Q-id) and fetch its artist properties in one WDQS query"""
+        
+        # Escaped for a SPARQL string literal; names from imported records can contain quotes and line breaks
+        term = search_term.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        # The best match is picked in a subquery first, so the OPTIONAL properties are fetched for one item
+        # rather than for every search result before sorting
+        query = f"""
+        SELECT ?item ?description_ro ?description_en ?birth ?death ?image
+        WHERE {{
+            {{
+                SELECT ?item
+                WHERE {{
+                    SERVICE wikibase:mwapi {{
+                        bd:serviceParam wikibase:endpoint "www.wikidata.org" ;
+                                        wikibase:api "EntitySearch" ;
+                                        mwapi:search "{term}" ;
+                                        mwapi:language "en" .
+                        ?item wikibase:apiOutputItem mwapi:item .
+                        ?ordinal wikibase:apiOrdinal true .
+                    }}
+                }}
+                ORDER BY ?ordinal
+                LIMIT 1
+            }}
+            OPTIONAL {{ ?item schema:description ?description_ro . FILTER(LANG(?description_ro) = "ro") }}
+            OPTIONAL {{ ?item schema:description ?description_en . FILTER(LANG(?description_en) = "en") }}
+            OPTIONAL {{ ?item wdt:P569 ?birth }}
+            OPTIONAL {{ ?item wdt:P570 ?death }}
+            OPTIONAL {{ ?item wdt:P18 ?image }}
+        }}
+        LIMIT 1
+        """
         
         try:
-            data = await self.get_entity(entity_id) 
-            entity_data = data.get('entities', {}).get(entity_id, {})
-            labels = entity_data.get('labels', {})
-            
-            if 'ro' in labels:
-                return labels['ro']['value']
-            elif 'en' in labels:
-                return labels['en']['value']
-            elif labels:
-                return next(iter(labels.values()))['value']
+            response = await self.client.get(
+                settings.WIKIDATA_SPARQL,
+                params={'query': query, 'format': 'json'},
+                headers=self.headers,
+                timeout=10.0
+            )
+            response.raise_for_status()
+            bindings = response.json().get('results', {}).get('bindings', [])
             
+            return bindings[0] if bindings else None
+        
+        except Exception as e:
+            logger.error(f"HTTP error querying Wikidata SPARQL for {search_term}: {e}")
             return None
+    
+    async def get_entity_label(self, entity_id: str) -> Optional[str]:
+        """Get the label (name) for a Wikidata entity by ID"""
+        
+        try:
+            return (await self.get_entity_labels([entity_id])).get(entity_id)
         
         except Exception as e:
             logger.error(f"HTTP error getting label for entity {entity_id}: {e}")
@@ -84,10 +174,29 @@ class WikidataService:
 class GettyService:
     """Service for querying Getty vocabularies (AAT, ULAN, TGN)"""
     
-    def __init__(self):
-        self.endpoint = SPARQLWrapper(settings.GETTY_AAT_SPARQL)
-        self.endpoint.setReturnFormat(JSON)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client if client is not None else httpx.AsyncClient()
+        self.endpoint = settings.GETTY_AAT_SPARQL
+        self.headers = {
+            'Accept': 'application/sparql-results+json',
+            'User-Agent': 'HeritageProvenanceSystem/1.0 (https://github.com/onfma/Artwork-Provenance; contact@yahoo.com)'
+        }
     
+    async def _query(self, query: str) -> Dict[str, Any]:
+        """Run a SELECT query against the Getty endpoint over the pooled client and return the JSON results"""
+        
+        # Getty's endpoint is noticeably slower than Wikidata's, so allow it more time; the `timeout` parameter
+        # (RDF4J protocol, in seconds) makes the server stop a query we would give up on anyway
+        response = await self.client.get(
+            self.endpoint,
+            params={'query': query, 'timeout': settings.GETTY_SPARQL_SERVER_TIMEOUT},
+            headers=self.headers,
+            timeout=settings.GETTY_SPARQL_CLIENT_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    @cached(prefix="getty:wikidata_id")
     async def get_wikidata_id(self, getty_link: str) -> Optional[str]:
         """Extract Wikidata ID from Getty link if available"""
         artist_id = getty_link.split("/")[-1]
@@ -105,8 +214,7 @@ class GettyService:
         """
         
         try:
-            self.endpoint.setQuery(query)
-            results = self.endpoint.query().convert()
+            results = await self._query(query)
             bindings = results.get("results", {}).get("bindings", [])
             
             if bindings:
@@ -120,6 +228,7 @@ class GettyService:
             logger.error(f"Error querying Getty for Wikidata ID: {e}")
             return None
     
+    @cached(prefix="getty:location_parent")
     async def get_location_parent(self, location_link: str) -> Optional[str]:
         """Get broader location from Getty TGN"""
  
@@ -138,19 +247,19 @@ class GettyService:
         """
         
         try:
-            self.endpoint.setQuery(query)
-            results = self.endpoint.query().convert()
+            results = await self._query(query)
+            bindings = results.get("results", {}).get("bindings", [])
+
+            if bindings:
+                return bindings[0].get("broaderLocation", {}).get("value")
 
-            location = results.get("results", {}).get("bindings", []).get[0].get("broaderLocation", {}).get("value", None)
-            if location:
-                return location
-                
             return None
         
         except Exception as e:
             logger.error(f"Error querying Getty for broader location: {e}")
             return None
 
+    @cached(prefix="getty:artist_network")
     async def get_artist_network(self, artist_getty_link: str) -> Dict[str, Any]:
         """Get artist network based on student_of/teacher_of relationships from Getty ULAN"""
 
@@ -158,32 +267,37 @@ class GettyService:
             """Format Getty SPARQL results into structured dict"""
             bindings = results.get("results", {}).get("bindings", [])
             
-            formatted = {
-                "nodes": [],
-                "edges": []
-            }
+            # An artist can be both teacher and student of the same person: one node, one edge per relationship
+            nodes = {}
+            edges = []
+            seen_edges = set()
             
             for binding in bindings:
                 related_artist = binding.get("relatedArtist", {}).get("value", "")
                 relationship_type = binding.get("relationshipType", {}).get("value", "")
-                artist_name = binding.get("relatedArtistName", {}).get("value", "Unknown")
                 
                 # Extract ID from URI
                 artist_id = related_artist.split("/")[-1] if related_artist else None
                 
                 if artist_id:
-                    formatted["nodes"].append({
+                    nodes.setdefault(artist_id, {
                         "id": artist_id,
                         "uri": related_artist,
-                        "name": artist_name
+                        "name": binding.get("relatedArtistName", {}).get("value", "Unknown")
                     })
                     
-                    formatted["edges"].append({
-                        "target": artist_id,
-                        "relationship": relationship_type
-                    })
+                    edge_key = (artist_id, relationship_type)
+                    if edge_key not in seen_edges:
+                        seen_edges.add(edge_key)
+                        edges.append({
+                            "target": artist_id,
+                            "relationship": relationship_type
+                        })
             
-            return formatted
+            return {
+                "nodes": list(nodes.values()),
+                "edges": edges
+            }
         
         artist_id = "ulan:" + artist_getty_link.split("/")[-1]
         
@@ -221,8 +335,7 @@ class GettyService:
         """
         
         try:
-            self.endpoint.setQuery(query)
-            results = self.endpoint.query().convert()
+            results = await self._query(query)
             results =  _results_formater(results)
             if results["nodes"] or results["edges"]:
                 return results
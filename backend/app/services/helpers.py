@@ -1,5 +1,6 @@
 import structlog
 from typing import Dict, Any, List
+from urllib.parse import unquote
 
 logger = structlog.get_logger()
 
@@ -48,6 +49,35 @@ def wikidata_parser_for_artist(wikidata_data: Dict[str, Any]) -> Dict[str, Any]:
     
     return parsed_data
 
+def wikidata_parser_for_artist_binding(binding: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse a WDQS result row (see WikidataService.sparql_lookup) into the same shape as wikidata_parser_for_artist"""
+    
+    parsed_data = {}
+    
+    try:
+        description = binding.get('description_ro', {}).get('value', '')
+        if description is None or description == '':
+            description = binding.get('description_en', {}).get('value', '')
+        parsed_data['description'] = description
+        
+        # birth date (P569)
+        if 'birth' in binding:
+            parsed_data['birth_date'] = format_wikidata_date(binding['birth']['value'])
+        
+        # death date (P570)
+        if 'death' in binding:
+            parsed_data['death_date'] = format_wikidata_date(binding['death']['value'])
+        
+        # image (P18), returned by WDQS as a percent-encoded Special:FilePath URI
+        if 'image' in binding:
+            image_name = unquote(binding['image']['value'].rsplit('/', 1)[-1])
+            parsed_data['image_url'] = f"https://commons.wikimedia.org/wiki/Special:FilePath/{image_name.replace(' ', '_')}"
+    
+    except Exception as e:
+        logger.error(f"Error parsing Wikidata SPARQL binding for artist: {e}")
+    
+    return parsed_data
+
 def wikidata_parser_for_artwork(wikidata_data: Dict[str, Any]) -> Dict[str, Any]:
     """Parse Wikidata response to extract relevant artwork information"""
     
@@ -120,21 +150,18 @@ def format_getty_network_artists(results: List[Dict[str, Any]]) -> List[Dict[str
         concept_uri = row['concept']['value']
         concept_name = row['conceptName']['value']
         
-        if artist_uri not in artists_map:
-            artists_map[artist_uri] = {
-                'artist_uri': artist_uri,
-                'artist_name': artist_name,
-                'shared_concepts': [],
-                'total_connections': 0
-            }
+        artist = artists_map.setdefault(artist_uri, {
+            'artist_uri': artist_uri,
+            'artist_name': artist_name,
+            'shared_concepts': [],
+            'total_connections': 0
+        })
         
-        connection_info = {
+        artist['shared_concepts'].append({
             'uri': concept_uri,
             'name': concept_name
-        }
-        
-        artists_map[artist_uri]['shared_concepts'].append(connection_info)
-        artists_map[artist_uri]['total_connections'] += 1
+        })
+        artist['total_connections'] += 1
     
     connected_artists = list(artists_map.values())
     connected_artists.sort(key=lambda x: x['total_connections'], reverse=True)
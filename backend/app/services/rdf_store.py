@@ -2,29 +2,113 @@
 RDF Store Service - Manages RDF data and SPARQL queries
 """
 
+import copy
+import functools
+import itertools
+import re
+import secrets
+import threading
 import structlog
-from typing import Dict, Any
+from cachetools import LRUCache, TTLCache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from urllib.parse import quote
 from app.config import settings
-from SPARQLWrapper import SPARQLWrapper
 from rdflib import Graph, Namespace, URIRef, Literal
-from rdflib.namespace import RDF, RDFS, OWL, XSD, DCTERMS, FOAF
+from rdflib.term import Node
+from rdflib.namespace import RDF, RDFS, OWL, XSD, DCTERMS, FOAF, PROV
+from rdflib.plugins.sparql import prepareQuery
 
-from app.models import ArtworkType
+from app.models import ArtworkType, TYPE_KEYWORDS
 
 
 logger = structlog.get_logger()
 
-TYPE_KEYWORDS = {
-    "drawing": ["desen", "drawing", "schiță", "schita", "sketch", "creion", "pencil", "cărbune", "charcoal", "tuș", "ink", "pastel", "grafică", "graphic"],
-    "print": ["gravură", "gravura", "print", "litografie", "lithograph", "acvaforte", "etching", "xilogravură", "woodcut", "stampă", "serigrafie"],
-    "photograph": ["fotografie", "fotografia", "photograph", "photo", "foto", "negativ", "negative", "daguerreotype"],
-    "manuscript": ["manuscris", "manuscript", "document", "scrisoare", "letter", "incunabul", "carte"],
-    "installation": ["instalație", "instalatie", "installation"],
-    "artifact": ["artefact", "artifact", "ceramică", "ceramic", "pottery", "porțelan", "textil", "textile", "covor", "carpet", "tapiserie", "monedă", "coin", "bijuterie", "jewelry", "mobilier", "furniture", "vas", "vessel"],
-    "sculpture": ["sculptură", "sculptura", "sculpture", "statuie", "statue", "bust", "relief", "bronz", "bronze", "marmură", "marble", "ronde-bosse"],
-    "painting": ["pictură", "pictura", "painting", "ulei", "oil", "pânză", "panza", "canvas"]
-}
+
+def _sparql_regex(keywords) -> str:
+    """Regex alternation of literal keywords, escaped for use inside a SPARQL string literal"""
+    pattern = "|".join(re.escape(keyword) for keyword in keywords)
+    return pattern.replace('\\', '\\\\').replace('"', '\\"')
+
+
+# One REGEX per type label instead of an LCASE + CONTAINS per keyword
+_TYPE_LABEL_REGEX = {type_key: _sparql_regex(keywords) for type_key, keywords in TYPE_KEYWORDS.items()}
+
+
+# Classes whose instances are counted incrementally (see RDFStoreService.instance_count)
+COUNTED_CLASSES = (PROV.Entity, PROV.Agent, PROV.Activity, PROV.Location)
+
+
+class _CachedNamespace:
+    """Attribute access to a namespace's terms that builds each URIRef only once.
+    
+    rdflib creates (and validates) a new URIRef on every Namespace attribute access, and the triple
+    builders touch a dozen terms per imported record. The first access stores the term as an instance
+    attribute, so later ones are plain attribute lookups that never reach __getattr__.
+    """
+    
+    def __init__(self, namespace):
+        self._namespace = namespace
+    
+    def __getattr__(self, name: str) -> URIRef:
+        term = self._namespace[name]
+        setattr(self, name, term)
+        return term
+
+
+# Well-known vocabularies as used by the triple builders
+_RDF, _RDFS, _OWL, _FOAF = (_CachedNamespace(namespace) for namespace in (RDF, RDFS, OWL, FOAF))
+
+
+def _entity_cached(method):
+    """Memoise a single-entity lookup per graph generation.
+    
+    Entries from before a write are never hit again and age out of the TTL cache.
+    Callers get a private copy, since routers add enrichment keys to the returned dict.
+    """
+    
+    @functools.wraps(method)
+    def wrapper(self, uri: str):
+        key = (method.__name__, self.generation, uri)
+        with self._entity_cache_lock:
+            found = key in self._entity_cache
+            result = self._entity_cache.get(key)
+        
+        if not found:
+            result = method(self, uri)
+            with self._entity_cache_lock:
+                self._entity_cache[key] = result
+        
+        return copy.deepcopy(result)
+    
+    return wrapper
+
+
+def _page(rows, limit: Optional[int], skip: int):
+    """Rows `skip` to `skip + limit` of a result (all remaining rows when there is no limit).
+    
+    Paging is applied to the rows rather than written into the query as LIMIT/OFFSET, so every page
+    of a listing shares one query text and one parse. rdflib sorts the whole solution sequence before
+    slicing either way, so nothing is evaluated that a LIMIT would have skipped.
+    """
+    return itertools.islice(rows, skip, skip + limit if limit else None)
+
+
+def _order_patterns(patterns: List[str]) -> str:
+    """
+    Order triple patterns by estimated selectivity before writing them into a query.
+    Not every store reorders basic graph patterns, so the most selective ones go first:
+    patterns with a concrete IRI, then plain joins, then broad rdf:type patterns.
+    The sort is stable, so patterns of the same rank keep their relative order.
+    """
+    
+    def rank(pattern: str) -> int:
+        if " a " in pattern or " rdf:type " in pattern:
+            return 2
+        if "<" in pattern:
+            return 0
+        return 1
+    
+    return "\n            ".join(sorted(patterns, key=rank))
 
 
 class RDFStoreService:
@@ -33,6 +117,25 @@ class RDFStoreService:
     def __init__(self):
         self.graph = Graph()
         
+        # Bumped once per write (parse, add_batch, remove_triples), so result caches can key on it.
+        # Writes must go through those methods; a per-triple store event hook would slow bulk loads by about a third.
+        self.generation = 0
+        # Random per process: generation restarts at 0 on every load, so anything that outlives the
+        # process (HTTP validators) keys on both
+        self.load_token = secrets.token_hex(8)
+        # Distinct instances of the classes shown in the dashboard overview: recounted after a parse or removal,
+        # updated by add_batch from the batch's own rdf:type triples
+        self._instance_counts = dict.fromkeys(COUNTED_CLASSES, 0)
+        
+        # get_artwork / get_location / get_event results; lookups run in worker threads, hence the lock
+        self._entity_cache = TTLCache(maxsize=settings.ENTITY_CACHE_SIZE, ttl=settings.ENTITY_CACHE_TTL)
+        self._entity_cache_lock = threading.Lock()
+        
+        # rdflib's pyparsing grammar is not thread-safe, so queries are parsed one at a time;
+        # parsed queries are kept, keyed with the generation because loading data can bind new prefixes
+        self._parse_lock = threading.Lock()
+        self._prepared_queries = LRUCache(maxsize=settings.PREPARED_QUERY_CACHE_SIZE)
+        
         self.ns = {
             'dbo': Namespace("http://dbpedia.org/ontology/"),
             'wdt': Namespace("http://www.wikidata.org/prop/direct/"),
@@ -47,6 +150,8 @@ class RDFStoreService:
         
         for prefix, namespace in self.ns.items():
             self.graph.bind(prefix, namespace)
+        # Same namespaces for the triple builders, with each term created once
+        self._terms = {prefix: _CachedNamespace(namespace) for prefix, namespace in self.ns.items()}
         
         self.graph.bind('rdf', RDF)
         self.graph.bind('rdfs', RDFS)
@@ -55,20 +160,56 @@ class RDFStoreService:
         self.graph.bind('dcterms', DCTERMS)
         self.graph.bind('foaf', FOAF)
         
-        self.dbpedia_endpoint = SPARQLWrapper(settings.DBPEDIA_SPARQL)
-        self.wikidata_endpoint = SPARQLWrapper(settings.WIKIDATA_SPARQL)
-        self.getty_endpoint = SPARQLWrapper(settings.GETTY_AAT_SPARQL)
+    
+    def _recount_instances(self):
+        """Count the instances of every counted class from the rdf:type index (one pass per class)"""
+        self._instance_counts = {
+            class_uri: sum(1 for _ in self.graph.subjects(RDF.type, class_uri)) for class_uri in COUNTED_CLASSES
+        }
+    
+    def _parse(self, source: str, format: str):
+        """Load a file into the graph as one write"""
+        try:
+            self.graph.parse(source, format=format)
+        finally:
+            self.generation += 1
+            self._recount_instances()
+    
+    def remove_triples(self, triple_pattern: Tuple[Any, Any, Any]):
+        """Remove every triple matching a pattern (None as a wildcard) as one write"""
+        try:
+            self.graph.remove(triple_pattern)
+        finally:
+            self.generation += 1
+            self._recount_instances()
+    
+    def instance_count(self, class_uri: str) -> Optional[int]:
+        """Number of distinct instances of a class, or None if the class is not counted"""
+        return self._instance_counts.get(URIRef(class_uri))
+    
+    def _query(self, query: str, bindings: Dict[str, Any] = None):
+        """Parse a query (or reuse its earlier parse) under the parse lock, then evaluate it outside the lock.
         
+        Values that change per request (such as the entity IRI) go in bindings rather than into the query text,
+        so one parse serves every entity and nothing from the request is spliced into SPARQL.
+        """
+        key = (query, self.generation)
+        with self._parse_lock:
+            prepared = self._prepared_queries.get(key)
+            if prepared is None:
+                prepared = prepareQuery(query, initNs=dict(self.graph.namespaces()))
+                self._prepared_queries[key] = prepared
+        return self.graph.query(prepared, initBindings=bindings)
     
     async def initialize(self):
         """Initialize RDF store and load ontologies"""
         try:
             # Load ontologies
             logger.info("Loading CIDOC-CRM ontology")
-            self.graph.parse(settings.CIDOC_CRM_FILE, format="xml")
+            self._parse(settings.CIDOC_CRM_FILE, format="xml")
             
             logger.info("Loading Prov ontology")
-            self.graph.parse(settings.PROV_FILE, format="ttl")
+            self._parse(settings.PROV_FILE, format="ttl")
             
             # Load data files from data directory
             await self.load_data_files()
@@ -79,6 +220,13 @@ class RDFStoreService:
             logger.error(f"Error initializing RDF store: {e}")
             raise
     
+    async def close(self):
+        """Release the underlying graph store"""
+        try:
+            self.graph.close()
+        except Exception as e:
+            logger.error(f"Error closing RDF store: {e}")
+    
     async def load_data_files(self):
         """Load all RDF data files from the data directory"""
         from pathlib import Path
@@ -103,7 +251,7 @@ class RDFStoreService:
                     }
                     file_format = format_map.get(file_path.suffix, 'turtle')
                     
-                    self.graph.parse(str(file_path), format=file_format)
+                    self._parse(str(file_path), format=file_format)
                     logger.info(f"Loaded {file_path.name} successfully")
                     
                 except Exception as e:
@@ -124,192 +272,260 @@ class RDFStoreService:
     # Adding entities as RDFs
     ##########################
 
-    def add_artwork(self, artwork_uri: str, artwork_data: Dict[str, Any]) -> bool:
-        """Add artwork to RDF store"""
-
-        def add_artwork_id(artwork_id: str):
-            try:                
-                identifier_uri = URIRef(f"{artwork_uri}/identifier/{quote(artwork_id, safe='')}")
-                self.graph.add((identifier_uri, RDF.type, crm.E42_Identifier))
-                self.graph.add((identifier_uri, crm.P190_has_symbolic_content, Literal(artwork_id)))
-                
-                self.graph.add((artwork_ref, crm.P1_is_identified_by, identifier_uri))
-                return True
-            except Exception as e:
-                logger.error(f"Error adding artwork to RDF store: {e}")
-            return False
+    def add_batch(self, triples: List[Tuple[Any, Any, Any]]) -> bool:
+        """Add a group of triples in one call (one record's worth from the importer).
         
-        def add_artwork_title(title: str):
-            try:
-                title_uri = URIRef(f"{artwork_uri}/title/{quote(title, safe='')}")
-                self.graph.add((title_uri, RDF.type, crm.E35_Title))
-                self.graph.add((title_uri, crm.P190_has_symbolic_content, Literal(title)))
-
-                self.graph.add((artwork_ref, crm.P102_has_title, title_uri))
-                return True
-            except Exception as e:
-                logger.error(f"Error adding artwork title to RDF store: {e}")
+        Every term is checked before anything is written, so a batch with a bad term adds nothing. Batches are
+        not transactions, though: if the store itself fails part-way, the triples already added stay in the graph
+        (the instance counts are then recounted, so they still match what is stored).
+        """
+        graph = self.graph
+        counts = self._instance_counts
+        # Instances the batch creates, found while checking the terms; a type triple already stored adds nothing
+        new_instances = set()
+        for triple in triples:
+            if not all(isinstance(term, Node) for term in triple):
+                logger.error(f"Not adding triples to RDF store, {triple} has a term that is not an rdflib term")
+                return False
+            subject, predicate, obj = triple
+            if predicate == RDF.type and obj in counts and triple not in graph:
+                new_instances.add((subject, obj))
+        
+        try:
+            graph.addN((s, p, o, graph) for s, p, o in triples)
+            for _, class_uri in new_instances:
+                counts[class_uri] += 1
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error adding triples to RDF store, the batch may be partly written: {e}")
+            self._recount_instances()
             return False
+        
+        finally:
+            self.generation += 1
 
+    def artwork_triples(self, artwork_uri: str, artwork_data: Dict[str, Any]) -> List[Tuple[Any, Any, Any]]:
+        """Triples describing an artwork"""
+        
+        prov = self._terms['prov']
+        crm = self._terms['crm']
+        artwork_ref = URIRef(artwork_uri)
+        
+        triples = [
+            (artwork_ref, _RDF.type, prov.Entity),
+            (artwork_ref, _RDF.type, crm.E22_Man_Made_Object),
+        ]
+        
         try:
-            prov = self.ns['prov']
-            crm = self.ns['crm']
-            artwork_ref = URIRef(artwork_uri)
-            
-            self.graph.add((artwork_ref, RDF.type, prov.Entity))
-            self.graph.add((artwork_ref, RDF.type, crm.E22_Man_Made_Object))
-            add_artwork_id(artwork_data.get('inventoryNumber'))
-            add_artwork_title(artwork_data.get('title'))
-            
-            if artwork_data.get('imageURL'):
-                self.graph.add((artwork_ref, FOAF.depiction, URIRef(artwork_data.get('imageURL'))))
-
-            if artwork_data.get('type_uri'):
-                self.graph.add((artwork_ref, crm.P2_has_type, URIRef(artwork_data.get('type_uri'))))
-            if artwork_data.get('subject_uri'):
-                self.graph.add((artwork_ref, crm.P15_was_influenced_by, URIRef(artwork_data.get('subject_uri'))))
-            if artwork_data.get('material_uri'):
-                self.graph.add((artwork_ref, crm.P45_consists_of, URIRef(artwork_data.get('material_uri'))))
-            logger.info(f"Added artwork to RDF store: {artwork_uri}")
-            return True
-            
+            artwork_id = artwork_data.get('inventoryNumber')
+            identifier_uri = URIRef(f"{artwork_uri}/identifier/{quote(artwork_id, safe='')}")
+            triples += [
+                (identifier_uri, _RDF.type, crm.E42_Identifier),
+                (identifier_uri, crm.P190_has_symbolic_content, Literal(artwork_id)),
+                (artwork_ref, crm.P1_is_identified_by, identifier_uri),
+            ]
         except Exception as e:
             logger.error(f"Error adding artwork to RDF store: {e}")
-            return False
-    
-    def add_entity(self, entity_type: str, entity_uri: str, entity_name: str, entity_link: str) -> bool:
-        """Add artwork details entities to RDF store"""      
+        
         try:
-            crm = self.ns['crm']
-            prov = self.ns['prov']
-            entity_ref = URIRef(entity_uri)
+            title = artwork_data.get('title')
+            title_uri = URIRef(f"{artwork_uri}/title/{quote(title, safe='')}")
+            triples += [
+                (title_uri, _RDF.type, crm.E35_Title),
+                (title_uri, crm.P190_has_symbolic_content, Literal(title)),
+                (artwork_ref, crm.P102_has_title, title_uri),
+            ]
+        except Exception as e:
+            logger.error(f"Error adding artwork title to RDF store: {e}")
+        
+        if artwork_data.get('imageURL'):
+            triples.append((artwork_ref, _FOAF.depiction, URIRef(artwork_data.get('imageURL'))))
+        
+        if artwork_data.get('type_uri'):
+            triples.append((artwork_ref, crm.P2_has_type, URIRef(artwork_data.get('type_uri'))))
+        if artwork_data.get('subject_uri'):
+            triples.append((artwork_ref, crm.P15_was_influenced_by, URIRef(artwork_data.get('subject_uri'))))
+        if artwork_data.get('material_uri'):
+            triples.append((artwork_ref, crm.P45_consists_of, URIRef(artwork_data.get('material_uri'))))
+        
+        return triples
 
-            if entity_link:
-                self.graph.add((entity_ref, OWL.sameAs, URIRef(f"{entity_link}")))
-            
-            if entity_type == 'provider' or entity_type == 'institute':
-                self.graph.add((entity_ref, RDF.type, prov.Agent))
-            else:
-                self.graph.add((entity_ref, RDFS.label, Literal(entity_name)))
-                if entity_type == 'type':
-                    self.graph.add((entity_ref, RDF.type, crm.E55_Type))
-                elif entity_type == 'subject':
-                    self.graph.add((entity_ref, RDF.type, crm.E28_Conceptual_Object))
-                elif entity_type == 'material':
-                    self.graph.add((entity_ref, RDF.type, crm.E57_Material))
+    def entity_triples(self, entity_type: str, entity_uri: str, entity_name: str, entity_link: str) -> List[Tuple[Any, Any, Any]]:
+        """Triples describing an artwork details entity (type, subject, material, provider, institute)"""
+        
+        crm = self._terms['crm']
+        prov = self._terms['prov']
+        entity_ref = URIRef(entity_uri)
+        triples = []
+        
+        if entity_link:
+            triples.append((entity_ref, _OWL.sameAs, URIRef(f"{entity_link}")))
+        
+        if entity_type == 'provider' or entity_type == 'institute':
+            triples.append((entity_ref, _RDF.type, prov.Agent))
+        else:
+            triples.append((entity_ref, _RDFS.label, Literal(entity_name)))
+            if entity_type == 'type':
+                triples.append((entity_ref, _RDF.type, crm.E55_Type))
+            elif entity_type == 'subject':
+                triples.append((entity_ref, _RDF.type, crm.E28_Conceptual_Object))
+            elif entity_type == 'material':
+                triples.append((entity_ref, _RDF.type, crm.E57_Material))
+        
+        return triples
 
-            logger.info(f"Added {entity_type} to RDF store: {entity_uri}")
-            return True
-            
+    def artist_triples(self, artist_uri: str, artist_data: Dict[str, Any]) -> List[Tuple[Any, Any, Any]]:
+        """Triples describing an artist"""
+        
+        prov = self._terms['prov']
+        crm = self._terms['crm']
+        artist_ref = URIRef(artist_uri)
+        
+        triples = [
+            (artist_ref, _RDF.type, prov.Agent),
+            (artist_ref, _RDF.type, crm.E21_Person),
+            (artist_ref, _FOAF.name, Literal(artist_data['creator'])),
+        ]
+        if 'creatorULAN' in artist_data and artist_data['creatorULAN']:
+            triples.append((artist_ref, _OWL.sameAs, URIRef(f"{artist_data['creatorULAN']}")))
+        
+        return triples
+
+    def location_triples(self, location_uri: str, location_data: Dict[str, Any]) -> List[Tuple[Any, Any, Any]]:
+        """Triples describing a location"""
+        
+        prov = self._terms['prov']
+        crm = self._terms['crm']
+        location_ref = URIRef(location_uri)
+        
+        triples = [
+            (location_ref, _RDF.type, prov.Location),
+            (location_ref, _RDF.type, crm.E53_Place),
+            (location_ref, _RDFS.label, Literal(location_data['location'])),
+        ]
+        if 'locationTGN' in location_data and location_data['locationTGN']:
+            triples.append((location_ref, _OWL.sameAs, URIRef(f"{location_data['locationTGN']}")))
+        
+        return triples
+
+    def provenance_event_triples(self, event_uri: str, event_data: Dict[str, Any]) -> List[Tuple[Any, Any, Any]]:
+        """Triples describing a provenance event; links to a missing provider or institute are left out"""
+        
+        prov = self._terms['prov']
+        crm = self._terms['crm']
+        event_ref = URIRef(event_uri)
+        
+        triples = [
+            (event_ref, _RDF.type, prov.Activity),
+            (event_ref, _RDF.type, crm.E12_Production),
+            (event_ref, _RDFS.label, Literal(event_data['type'])),
+            (event_ref, crm.P14_carried_out_by, URIRef(event_data['artist_uri'])),
+            (event_ref, crm.P7_took_place_at, URIRef(event_data['location_uri'])),
+            (event_ref, crm.P108_has_produced, URIRef(event_data['artwork_uri'])),
+            (event_ref, crm.P4_has_time_span, Literal(event_data['date'])),
+        ]
+        if event_data.get('provider_uri'):
+            triples.append((event_ref, crm.P109_has_current_or_former_curator, URIRef(event_data['provider_uri'])))
+        if event_data.get('institute_uri'):
+            triples.append((event_ref, crm.P50i_is_currently_held_by, URIRef(event_data['institute_uri'])))
+        
+        return triples
+
+    def add_artwork(self, artwork_uri: str, artwork_data: Dict[str, Any]) -> bool:
+        """Add artwork to RDF store"""
+        return self._add_described("artwork", artwork_uri, self.artwork_triples, artwork_data)
+    
+    def add_entity(self, entity_type: str, entity_uri: str, entity_name: str, entity_link: str) -> bool:
+        """Add artwork details entities to RDF store"""
+        try:
+            triples = self.entity_triples(entity_type, entity_uri, entity_name, entity_link)
         except Exception as e:
             logger.error(f"Error adding {entity_type} to RDF store: {e}")
             return False
         
+        if self.add_batch(triples):
+            logger.info(f"Added {entity_type} to RDF store: {entity_uri}")
+            return True
+        return False
         
     def add_artist(self, artist_uri: str, artist_data: Dict[str, Any]) -> bool:
         """Add artist to RDF store"""
-
-        try:
-            prov = self.ns['prov']
-            crm = self.ns['crm']
-            artist_ref = URIRef(artist_uri)
-            
-            self.graph.add((artist_ref, RDF.type, prov.Agent))
-            self.graph.add((artist_ref, RDF.type, crm.E21_Person))
-            self.graph.add((artist_ref, FOAF.name, Literal(artist_data['creator'])))
-            
-            if 'creatorULAN' in artist_data and artist_data['creatorULAN']:
-                self.graph.add((artist_ref, OWL.sameAs, URIRef(f"{artist_data['creatorULAN']}")))
-
-            logger.info(f"Added artist to RDF store: {artist_uri}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error adding artist to RDF store: {e}")
-            return False
+        return self._add_described("artist", artist_uri, self.artist_triples, artist_data)
     
     def add_location(self, location_uri: str, location_data: Dict[str, Any]) -> bool:
         """Add location to RDF store"""
-
-        prov = self.ns['prov']
-        crm = self.ns['crm']
-        location_ref = URIRef(location_uri)
-
-        try:
-            self.graph.add((location_ref, RDF.type, prov.Location))
-            self.graph.add((location_ref, RDF.type, crm.E53_Place))
-            self.graph.add((location_ref, RDFS.label, Literal(location_data['location'])))
-            
-            if 'locationTGN' in location_data and location_data['locationTGN']:
-                self.graph.add((location_ref, OWL.sameAs, URIRef(f"{location_data['locationTGN']}")))
-
-            logger.info(f"Added location to RDF store: {location_uri}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error adding location to RDF store: {e}")
-            return False
+        return self._add_described("location", location_uri, self.location_triples, location_data)
 
     def add_provenance_event(self, event_uri: str, event_data: Dict[str, Any]) -> bool:
         """Add provenance event to RDF store"""
+        return self._add_described("provenance event", event_uri, self.provenance_event_triples, event_data)
+    
+    def _add_described(self, kind: str, uri: str, build_triples, data: Dict[str, Any]) -> bool:
+        """Build the triples for one resource and add them together; nothing is added if building fails"""
         try:
-            prov = self.ns['prov']
-            crm = self.ns['crm']
-            event_ref = URIRef(event_uri)
-            
-            self.graph.add((event_ref, RDF.type, prov.Activity))
-            self.graph.add((event_ref, RDF.type, crm.E12_Production))
-            self.graph.add((event_ref, RDFS.label, Literal(event_data['type'])))
-
-            self.graph.add((event_ref, crm.P14_carried_out_by, URIRef(event_data['artist_uri'])))
-            self.graph.add((event_ref, crm.P7_took_place_at, URIRef(event_data['location_uri'])))
-            self.graph.add((event_ref, crm.P108_has_produced, URIRef(event_data['artwork_uri'])))
-            self.graph.add((event_ref, crm.P4_has_time_span, Literal(event_data['date'])))
-            self.graph.add((event_ref, crm.P109_has_current_or_former_curator, URIRef(event_data['provider_uri'])))
-            self.graph.add((event_ref, crm.P50i_is_currently_held_by, URIRef(event_data['institute_uri'])))
-
-            logger.info(f"Added provenance event to RDF store: {event_uri}")
-            return True
-            
+            triples = build_triples(uri, data)
         except Exception as e:
-            logger.error(f"Error adding provenance event to RDF store: {e}")
+            logger.error(f"Error adding {kind} to RDF store: {e}")
             return False
+        
+        if self.add_batch(triples):
+            logger.info(f"Added {kind} to RDF store: {uri}")
+            return True
+        return False
 
-    ##########################
-    # Querying RDFs [SPARQL]
-    ##########################
 
     def get_all_artworks(self, filters: Dict[str, str] = None, search: str = None, limit: int = 20, skip: int = 0) -> list:
         """Query all artworks from RDF store with optional filters"""
         
+        try:
+            artworks = list(self.iter_artworks(filters=filters, search=search, limit=limit, skip=skip))
+            logger.info(f"Retrieved {len(artworks)} artworks from RDF store")
+            return artworks
+            
+        except Exception as e:
+            logger.error(f"Error querying artworks: {e}")
+            return []
+    
+    def iter_artworks(self, filters: Dict[str, str] = None, search: str = None, limit: int = None, skip: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield artworks one at a time, as each query row is turned into a dict.
+        
+        The query's DISTINCT and ORDER BY (kept so skip pages through a stable order) make rdflib collect every
+        matching row before the first one is yielded; what is not built is the list of artwork dicts.
+        """
+        
+        patterns = [
+            "?artwork a prov:Entity .",
+            "?artwork a crm:E22_Man_Made_Object ."
+        ]
         filter_clauses = ""
         search_filter = ""
+        bindings = None
         
         if filters:
-            if filters.get('type'):
-                type_key = filters['type'].lower()
-                keywords = TYPE_KEYWORDS.get(type_key, [type_key])
-                keyword_conditions = " || ".join([f'CONTAINS(LCASE(?typeLabel), "{k}")' for k in keywords])
-                filter_clauses += f"""
-            ?artwork crm:P2_has_type ?type .
-            ?type rdfs:label ?typeLabel .
-            FILTER({keyword_conditions})"""
-            if filters.get('material_uri'):
-                filter_clauses += f"\n            ?artwork crm:P45_consists_of <{filters['material_uri']}> ."
-            if filters.get('subject_uri'):
-                filter_clauses += f"\n            ?artwork crm:P15_was_influenced_by <{filters['subject_uri']}> ."
             if filters.get('artist_uri'):
-                filter_clauses += f"""
-            ?event crm:P108_has_produced ?artwork ;
-                   crm:P14_carried_out_by <{filters['artist_uri']}> ."""
+                patterns.append(f"?event crm:P14_carried_out_by <{filters['artist_uri']}> .")
             if filters.get('location_uri'):
-                filter_clauses += f"""
-            ?event crm:P108_has_produced ?artwork ;
-                   crm:P7_took_place_at <{filters['location_uri']}> ."""
+                patterns.append(f"?event crm:P7_took_place_at <{filters['location_uri']}> .")
+            if filters.get('artist_uri') or filters.get('location_uri'):
+                patterns.append("?event crm:P108_has_produced ?artwork .")
+            if filters.get('material_uri'):
+                patterns.append(f"?artwork crm:P45_consists_of <{filters['material_uri']}> .")
+            if filters.get('subject_uri'):
+                patterns.append(f"?artwork crm:P15_was_influenced_by <{filters['subject_uri']}> .")
+            if filters.get('type'):
+                type_key = filters['type'].lower()
+                type_regex = _TYPE_LABEL_REGEX.get(type_key) or _sparql_regex([type_key])
+                patterns.append("?artwork crm:P2_has_type ?type .")
+                patterns.append("?type rdfs:label ?typeLabel .")
+                filter_clauses = f"""
+            FILTER(REGEX(?typeLabel, "{type_regex}", "i"))"""
 
         if search:
-            safe_search = search.replace('"', '\\"')
-            search_filter = f'FILTER(CONTAINS(LCASE(?title), LCASE("{safe_search}")))'
+            # Bound rather than written into the query: any text is safe to search for, and every search
+            # with the same filters shares one parsed query
+            search_filter = 'FILTER(CONTAINS(LCASE(?title), ?search))'
+            bindings = {'search': Literal(search.lower())}
         
         query = f"""
         PREFIX prov: <http://www.w3.org/ns/prov#>
@@ -318,8 +534,7 @@ class RDFStoreService:
         
         SELECT DISTINCT ?artwork ?identifier ?title ?imageURL
         WHERE {{
-            ?artwork a prov:Entity ;
-                     a crm:E22_Man_Made_Object .{filter_clauses}
+            {_order_patterns(patterns)}{filter_clauses}
             
             OPTIONAL {{
                 ?artwork crm:P1_is_identified_by ?id .
@@ -338,37 +553,24 @@ class RDFStoreService:
             {search_filter}
         }}
         ORDER BY ?identifier
-        LIMIT {limit}
-        OFFSET {skip}
         """
         
-        try:
-            results = self.graph.query(query)
-            artworks = []
+        for row in _page(self._query(query, bindings), limit, skip):
+            artwork_uri = str(row.artwork)
+            artwork_id = artwork_uri.split('/')[-1]
             
-            for row in results:
-                artwork_uri = str(row.artwork)
-                artwork_id = artwork_uri.split('/')[-1]
-                
-                artwork_data = {
-                    'id': artwork_id,
-                    'uri': artwork_uri,
-                    'inventoryNumber': str(row.identifier) if row.identifier else None,
-                    'title': str(row.title) if row.title else None,
-                    'imageURL': str(row.imageURL) if row.imageURL else None
-                }
-                artworks.append(artwork_data)
-            
-            logger.info(f"Retrieved {len(artworks)} artworks from RDF store")
-            return artworks
-            
-        except Exception as e:
-            logger.error(f"Error querying artworks: {e}")
-            return []
+            yield {
+                'id': artwork_id,
+                'uri': artwork_uri,
+                'inventoryNumber': str(row.identifier) if row.identifier else None,
+                'title': str(row.title) if row.title else None,
+                'imageURL': str(row.imageURL) if row.imageURL else None
+            }
 
+    @_entity_cached
     def get_artwork(self, artwork_uri: str) -> Dict[str, Any]:
         """Query specific artwork details from RDF store"""
-        query = f"""
+        query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
@@ -380,55 +582,55 @@ class RDFStoreService:
                ?subject ?subjectLabel ?subjectLink
                ?material ?materialLabel ?materialLink
                ?artist ?artistName ?location ?locationName ?date ?event
-        WHERE {{
-            <{artwork_uri}> a prov:Entity ;
-                          a crm:E22_Man_Made_Object .
+        WHERE {
+            ?this a prov:Entity ;
+                  a crm:E22_Man_Made_Object .
             
-            OPTIONAL {{
-                <{artwork_uri}> crm:P1_is_identified_by ?id .
+            OPTIONAL {
+                ?this crm:P1_is_identified_by ?id .
                 ?id crm:P190_has_symbolic_content ?identifier .
-            }}
+            }
             
-            OPTIONAL {{
-                <{artwork_uri}> crm:P102_has_title ?titleNode .
+            OPTIONAL {
+                ?this crm:P102_has_title ?titleNode .
                 ?titleNode crm:P190_has_symbolic_content ?title .
-            }}
+            }
 
-            OPTIONAL {{
-                <{artwork_uri}> foaf:depiction ?imageURL .
-            }}
+            OPTIONAL {
+                ?this foaf:depiction ?imageURL .
+            }
             
-            OPTIONAL {{
-                <{artwork_uri}> crm:P2_has_type ?type .
+            OPTIONAL {
+                ?this crm:P2_has_type ?type .
                 ?type rdfs:label ?typeLabel .
                 ?type owl:sameAs ?typeLink .
-            }}
+            }
             
-            OPTIONAL {{
-                <{artwork_uri}> crm:P15_was_influenced_by ?subject .
+            OPTIONAL {
+                ?this crm:P15_was_influenced_by ?subject .
                 ?subject rdfs:label ?subjectLabel .
                 ?subject owl:sameAs ?subjectLink .
-            }}
+            }
             
-            OPTIONAL {{
-                <{artwork_uri}> crm:P45_consists_of ?material .
+            OPTIONAL {
+                ?this crm:P45_consists_of ?material .
                 ?material rdfs:label ?materialLabel .
                 ?material owl:sameAs ?materialLink .
-            }}
+            }
             
-            OPTIONAL {{
-                ?event crm:P108_has_produced <{artwork_uri}> ;
+            OPTIONAL {
+                ?event crm:P108_has_produced ?this ;
                        crm:P14_carried_out_by ?artist ;
                        crm:P7_took_place_at ?location ;
                        crm:P4_has_time_span ?date .
                 ?artist foaf:name ?artistName .
                 ?location rdfs:label ?locationName .
-            }}
-        }}
+            }
+        }
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'this': URIRef(artwork_uri)})
             
             if not results:
                 return None
@@ -496,16 +698,19 @@ class RDFStoreService:
             return None
 
 
-    def get_all_artists(self, filters: Dict[str, str] = None, limit: int = None) -> list:
+    def get_all_artists(self, filters: Dict[str, str] = None, limit: int = None, skip: int = 0) -> list:
         """Query all artists from RDF store with optional filters"""
         
-        filter_clauses = ""
+        patterns = [
+            "?artist a prov:Agent .",
+            "?artist a crm:E21_Person .",
+            "?artist foaf:name ?name ."
+        ]
         
         if filters:
             if filters.get('location_uri'):
-                filter_clauses += f"""
-            ?event crm:P14_carried_out_by ?artist ;
-                   crm:P7_took_place_at <{filters['location_uri']}> ."""
+                patterns.insert(0, f"?event crm:P7_took_place_at <{filters['location_uri']}> .")
+                patterns.insert(1, "?event crm:P14_carried_out_by ?artist .")
         
         query = f"""
         PREFIX prov: <http://www.w3.org/ns/prov#>
@@ -515,19 +720,17 @@ class RDFStoreService:
         
         SELECT DISTINCT ?artist ?name ?ulan
         WHERE {{
-            ?artist a prov:Agent ;
-                    a crm:E21_Person ;
-                    foaf:name ?name .{filter_clauses}
+            {_order_patterns(patterns)}
             OPTIONAL {{ ?artist owl:sameAs ?ulan . FILTER(CONTAINS(STR(?ulan), "ulan")) }}
         }}
         ORDER BY ?name
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query)
             artists = []
             
-            for row in results:
+            for row in _page(results, limit, skip):
                 artist_uri = str(row.artist)
                 artist_id = artist_uri.split('/')[-1]
                 
@@ -548,47 +751,47 @@ class RDFStoreService:
         
     def get_artist(self, artist_uri: str) -> Dict[str, Any]:
         """Query specific artist details from RDF store including all associated artworks"""
-        query = f"""
+        query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
         PREFIX foaf: <http://xmlns.com/foaf/0.1/>
         PREFIX owl: <http://www.w3.org/2002/07/owl#>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         
-        SELECT ?name ?ulan ?artwork ?artworkTitle ?artworkIdentifier ?artworkImageURL
-        WHERE {{
-            <{artist_uri}> a prov:Agent ;
-                          a crm:E21_Person ;
-                          foaf:name ?name .
+        SELECT DISTINCT ?name ?ulan ?artwork ?artworkTitle ?artworkIdentifier ?artworkImageURL
+        WHERE {
+            ?this a prov:Agent ;
+                  a crm:E21_Person ;
+                  foaf:name ?name .
             
-            OPTIONAL {{
-                <{artist_uri}> owl:sameAs ?ulan .
+            OPTIONAL {
+                ?this owl:sameAs ?ulan .
                 FILTER(CONTAINS(STR(?ulan), "ulan"))
-            }}
+            }
             
-            OPTIONAL {{
-                ?event crm:P14_carried_out_by <{artist_uri}> ;
+            OPTIONAL {
+                ?event crm:P14_carried_out_by ?this ;
                        crm:P108_has_produced ?artwork .
                 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork crm:P102_has_title ?titleNode .
                     ?titleNode crm:P190_has_symbolic_content ?artworkTitle .
-                }}
+                }
                 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork crm:P1_is_identified_by ?id .
                     ?id crm:P190_has_symbolic_content ?artworkIdentifier .
-                }}
+                }
 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork foaf:depiction ?artworkImageURL .
-                }}
-            }}
-        }}
+                }
+            }
+        }
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'this': URIRef(artist_uri)})
             
             if not results:
                 return None
@@ -601,6 +804,7 @@ class RDFStoreService:
                 'artworks': []
             }
             
+            # DISTINCT already folds repeated production events; the dict only guards against several names / Getty links
             artworks_dict = {}
             
             for row in results:
@@ -634,17 +838,17 @@ class RDFStoreService:
     def get_artist_by_getty_id(self, artist_getty_id) -> Dict[str, Any]:
         """Query specific artist by Getty ULAN ID from RDF store"""
         
-        query = f"""
+        query = """
         PREFIX owl: <http://www.w3.org/2002/07/owl#>
         
         SELECT ?artist
-        WHERE {{
-            ?artist owl:sameAs <http://vocab.getty.edu/ulan/{artist_getty_id}> .
-        }}
+        WHERE {
+            ?artist owl:sameAs ?ulan .
+        }
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'ulan': URIRef(f"http://vocab.getty.edu/ulan/{artist_getty_id}")})
             artists = []
             for row in results:
                 artist_uri = str(row.artist)
@@ -657,7 +861,7 @@ class RDFStoreService:
             return None
 
 
-    def get_all_locations(self) -> list:
+    def get_all_locations(self, limit: int = None, skip: int = 0) -> list:
         """Query all locations from RDF store"""
         query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
@@ -672,14 +876,14 @@ class RDFStoreService:
                       rdfs:label ?name .
             OPTIONAL { ?location owl:sameAs ?tgn . FILTER(CONTAINS(STR(?tgn), "tgn")) }
         }
-        ORDER BY ?name
+        ORDER BY ?name ?location
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query)
             locations = []
             
-            for row in results:
+            for row in _page(results, limit, skip):
                 location_uri = str(row.location)
                 location_id = location_uri.split('/')[-1]
                 
@@ -698,49 +902,50 @@ class RDFStoreService:
             logger.error(f"Error querying locations: {e}")
             return []
     
+    @_entity_cached
     def get_location(self, location_uri: str) -> Dict[str, Any]:
         """Query specific location details from RDF store including all associated artworks"""
-        query = f"""
+        query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX owl: <http://www.w3.org/2002/07/owl#>
         PREFIX foaf: <http://xmlns.com/foaf/0.1/>
         
-        SELECT ?name ?tgn ?artwork ?artworkTitle ?artworkIdentifier ?artworkImageURL
-        WHERE {{
-            <{location_uri}> a prov:Location ;
-                            a crm:E53_Place ;
-                            rdfs:label ?name .
+        SELECT DISTINCT ?name ?tgn ?artwork ?artworkTitle ?artworkIdentifier ?artworkImageURL
+        WHERE {
+            ?this a prov:Location ;
+                  a crm:E53_Place ;
+                  rdfs:label ?name .
             
-            OPTIONAL {{
-                <{location_uri}> owl:sameAs ?tgn .
+            OPTIONAL {
+                ?this owl:sameAs ?tgn .
                 FILTER(CONTAINS(STR(?tgn), "tgn"))
-            }}
+            }
             
-            OPTIONAL {{
-                ?event crm:P7_took_place_at <{location_uri}> ;
+            OPTIONAL {
+                ?event crm:P7_took_place_at ?this ;
                        crm:P108_has_produced ?artwork .
                 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork crm:P102_has_title ?titleNode .
                     ?titleNode crm:P190_has_symbolic_content ?artworkTitle .
-                }}
+                }
                 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork crm:P1_is_identified_by ?id .
                     ?id crm:P190_has_symbolic_content ?artworkIdentifier .
-                }}
+                }
                 
-                OPTIONAL {{
+                OPTIONAL {
                     ?artwork foaf:depiction ?artworkImageURL .
-                }}
-            }}
-        }}
+                }
+            }
+        }
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'this': URIRef(location_uri)})
             
             if not results:
                 return None
@@ -753,6 +958,7 @@ class RDFStoreService:
                 'artworks': []
             }
             
+            # DISTINCT already folds repeated production events; the dict only guards against several names / Getty links
             artworks_dict = {}
             
             for row in results:
@@ -784,7 +990,7 @@ class RDFStoreService:
             return None
         
     
-    def get_all_events(self) -> list:
+    def get_all_events(self, limit: int = None, skip: int = 0) -> list:
         """Query all provenance events from RDF store"""
         query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
@@ -820,14 +1026,14 @@ class RDFStoreService:
                 ?event crm:P4_has_time_span ?date .
             }
         }
-        ORDER BY ?date
+        ORDER BY ?date ?event
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query)
             events = []
             
-            for row in results:
+            for row in _page(results, limit, skip):
                 event_uri = str(row.event)
                 event_id = event_uri.split('/')[-1]
                 
@@ -858,9 +1064,10 @@ class RDFStoreService:
             logger.error(f"Error querying provenance events: {e}")
             return []
         
+    @_entity_cached
     def get_event(self, event_uri: str) -> Dict[str, Any]:
         """Query specific provenance event details from RDF store"""
-        query = f"""
+        query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
@@ -868,44 +1075,44 @@ class RDFStoreService:
         
         SELECT ?type ?artwork ?artworkTitle ?artworkIdentifier ?artworkImageURL
                ?artist ?artistName ?location ?locationName ?date
-        WHERE {{
-            <{event_uri}> a prov:Activity ;
-                         a crm:E12_Production ;
-                         rdfs:label ?type .
+        WHERE {
+            ?this a prov:Activity ;
+                  a crm:E12_Production ;
+                  rdfs:label ?type .
             
-            OPTIONAL {{
-                <{event_uri}> crm:P108_has_produced ?artwork .
-                OPTIONAL {{
+            OPTIONAL {
+                ?this crm:P108_has_produced ?artwork .
+                OPTIONAL {
                     ?artwork crm:P102_has_title ?titleNode .
                     ?titleNode crm:P190_has_symbolic_content ?artworkTitle .
-                }}
-                OPTIONAL {{
+                }
+                OPTIONAL {
                     ?artwork crm:P1_is_identified_by ?id .
                     ?id crm:P190_has_symbolic_content ?artworkIdentifier .
-                }}
-                OPTIONAL {{
+                }
+                OPTIONAL {
                     ?artwork foaf:depiction ?artworkImageURL .
-                }}
-            }}
+                }
+            }
             
-            OPTIONAL {{
-                <{event_uri}> crm:P14_carried_out_by ?artist .
+            OPTIONAL {
+                ?this crm:P14_carried_out_by ?artist .
                 ?artist foaf:name ?artistName .
-            }}
+            }
             
-            OPTIONAL {{
-                <{event_uri}> crm:P7_took_place_at ?location .
+            OPTIONAL {
+                ?this crm:P7_took_place_at ?location .
                 ?location rdfs:label ?locationName .
-            }}
+            }
             
-            OPTIONAL {{
-                <{event_uri}> crm:P4_has_time_span ?date .
-            }}
-        }}
+            OPTIONAL {
+                ?this crm:P4_has_time_span ?date .
+            }
+        }
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'this': URIRef(event_uri)})
             
             if not results:
                 return None
@@ -950,43 +1157,43 @@ class RDFStoreService:
             logger.error(f"Error querying event details: {e}")
             return None
     
-    def get_provenance_chain(self, artwork_uri: str) -> list:
+    def get_provenance_chain(self, artwork_uri: str, limit: int = None, skip: int = 0) -> list:
         """Query all provenance events for a specific artwork from RDF store"""
-        query = f"""
+        query = """
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX foaf: <http://xmlns.com/foaf/0.1/>
         
         SELECT ?event ?type ?artist ?artistName ?location ?locationName ?date
-        WHERE {{
+        WHERE {
             ?event a prov:Activity ;
                    a crm:E12_Production ;
                    rdfs:label ?type ;
-                   crm:P108_has_produced <{artwork_uri}> .
+                   crm:P108_has_produced ?this .
             
-            OPTIONAL {{
+            OPTIONAL {
                 ?event crm:P14_carried_out_by ?artist .
                 ?artist foaf:name ?artistName .
-            }}
+            }
             
-            OPTIONAL {{
+            OPTIONAL {
                 ?event crm:P7_took_place_at ?location .
                 ?location rdfs:label ?locationName .
-            }}
+            }
             
-            OPTIONAL {{
+            OPTIONAL {
                 ?event crm:P4_has_time_span ?date .
-            }}
-        }}
-        ORDER BY ?date
+            }
+        }
+        ORDER BY ?date ?event
         """
         
         try:
-            results = self.graph.query(query)
+            results = self._query(query, {'this': URIRef(artwork_uri)})
             events = []
             
-            for row in results:
+            for row in _page(results, limit, skip):
                 event_uri = str(row.event)
                 event_id = event_uri.split('/')[-1]
                 
@@ -1021,9 +1228,19 @@ class RDFStoreService:
     def execute_sparql(self, query: str) -> Any:
         """Execute arbitrary SPARQL query against RDF store"""
         try:
-            results = self.graph.query(query)
+            results = self._query(query)
+            if results.type == "SELECT":
+                # Evaluate now, in the caller's (worker) thread, rather than lazily wherever the rows are read
+                results.bindings
             logger.info("Executed SPARQL query successfully")
             return results
         except Exception as e:
             logger.error(f"Error executing SPARQL query: {e}")
             return None
+    
+    def iter_sparql(self, query: str, bindings: Dict[str, Any] = None) -> Iterator[Any]:
+        """Yield the rows of a SELECT query as rdflib produces them, without building a binding list first.
+        
+        Unlike execute_sparql, errors are raised to the caller.
+        """
+        yield from self._query(query, bindings)
@@ -14,6 +14,19 @@ from app.config import settings
 logger = structlog.get_logger()
 
 
+def _ordinal(n: int) -> str:
+    """English ordinal for a positive integer (1st, 2nd, 11th, 21st, ...)"""
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+# Creation years are read from four digits, so centuries 1-100 cover every date; built once instead of per artwork pair
+CENTURY_ORDINALS = [_ordinal(century + 1) for century in range(100)]
+
+
 class RecommendationEngine:
     """Engine for generating artwork recommendations"""
     
@@ -101,10 +114,10 @@ class RecommendationEngine:
                     # Within same 50-year period
                     if abs(year1 - year2) <= 50:
                         scores.append(1.0)
-                        reasons.append(f"Similar period: {century1 + 1}th century")
+                        reasons.append(f"Similar period: {CENTURY_ORDINALS[century1]} century")
                     else:
                         scores.append(0.7)
-                        reasons.append(f"Same century: {century1 + 1}th")
+                        reasons.append(f"Same century: {CENTURY_ORDINALS[century1]}")
             except:
                 pass
         
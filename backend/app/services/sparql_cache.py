@@ -0,0 +1,110 @@
+"""
+Result cache for SPARQL queries
+Identical queries (after normalisation) are answered from memory until the graph changes or the TTL expires
+"""
+
+import asyncio
+import hashlib
+import re
+import structlog
+from typing import Any, Dict, List, Optional, Tuple
+from cachetools import TTLCache
+from app.config import settings
+
+logger = structlog.get_logger()
+
+sparql_cache = TTLCache(maxsize=settings.SPARQL_CACHE_SIZE, ttl=settings.SPARQL_CACHE_TTL)
+_cache_lock = asyncio.Lock()
+
+
+# String literals, IRIs and escaped characters (kept verbatim), and runs of whitespace and comments.
+# Anything taken for an IRI that is really a comparison is only left unnormalised, never changed.
+_LEXICAL = re.compile(r'''
+    (?P<verbatim>
+        """(?:[^"\\]|\\.|"(?!""))*"""
+      | \'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+      | "(?:[^"\\\n]|\\.)*"
+      | '(?:[^'\\\n]|\\.)*'
+      | <[^<>"{}|^`\\\x00-\x20]*>
+      | \\.
+    )
+  | (?P<separator>(?:\s|\#[^\n]*)+)
+''', re.VERBOSE)
+
+_PREFIX_DECLS = re.compile(r"(?:PREFIX [^\s:]*: <[^>]*> )+", re.IGNORECASE)
+_PREFIX_DECL = re.compile(r"PREFIX [^\s:]*: <[^>]*> ", re.IGNORECASE)
+
+
+def _normalize_token(match: re.Match) -> str:
+    if match.lastgroup == "verbatim":
+        return match.group()
+    return " "
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for cache keys: comments dropped and whitespace collapsed, outside string
+    literals and IRIs only, and the leading PREFIX declarations sorted (their order has no meaning)"""
+    
+    normalized = _LEXICAL.sub(_normalize_token, query).strip() + " "
+    
+    prologue = _PREFIX_DECLS.match(normalized)
+    if prologue:
+        declarations = sorted(_PREFIX_DECL.findall(prologue.group()), key=str.casefold)
+        normalized = "".join(declarations) + normalized[prologue.end():]
+    
+    return normalized.rstrip()
+
+
+def query_key(endpoint: str, query: str, output_format: str, generation: int) -> tuple:
+    """Cache key for a query; the graph generation makes entries from before a write unreachable"""
+    digest = hashlib.blake2b(normalize_query(query).encode('utf-8'), digest_size=16).hexdigest()
+    return (endpoint, digest, output_format, generation)
+
+
+def _result_rows(rdf_service, query: str) -> Tuple[List[Dict[str, Optional[str]]], bool]:
+    """Run a query against the local graph and flatten its results to rows of strings.
+    
+    Also returns whether the rows may be cached: only SELECT results are, ASK and CONSTRUCT/DESCRIBE
+    answers are rendered as rows (a boolean, or the triples of the result graph) for the caller alone.
+    """
+    
+    results = rdf_service.execute_sparql(query)
+    if results is None:
+        raise ValueError("Query could not be executed")
+    
+    if results.type == "ASK":
+        return [{"boolean": str(results.askAnswer).lower()}], False
+    if results.type != "SELECT":
+        return [{"subject": str(s), "predicate": str(p), "object": str(o)} for s, p, o in results], False
+    
+    # Read the raw binding dicts instead of iterating the result, which builds a ResultRow per solution;
+    # variable names are converted once
+    columns = [(str(var), var) for var in results.vars]
+    formatted_results = []
+    for binding in results.bindings:
+        get = binding.get
+        formatted_results.append({name: str(value) if (value := get(var)) is not None else None for name, var in columns})
+    
+    return formatted_results, True
+
+
+async def cached_execute(rdf_service, query: str, endpoint: str = "local", output_format: str = "json") -> List[Dict[str, Any]]:
+    """Return the formatted bindings for a query, running it in a worker thread only on a cache miss.
+    
+    Cached rows are shared between callers and must not be mutated.
+    """
+    
+    key = query_key(endpoint, query, output_format, rdf_service.generation)
+    
+    async with _cache_lock:
+        rows = sparql_cache.get(key)
+    if rows is not None:
+        return rows
+    
+    rows, cacheable = await asyncio.to_thread(_result_rows, rdf_service, query)
+    if not cacheable:
+        return rows
+    
+    async with _cache_lock:
+        sparql_cache[key] = rows
+    return rows
@@ -0,0 +1,209 @@
+"""
+Pre-aggregated dashboard statistics
+Every dashboard aggregate is computed once per graph generation; the statistics endpoints only slice the snapshot
+"""
+
+import asyncio
+import structlog
+from typing import Any, Dict, List, Optional
+from app.services.sparql_cache import cached_execute
+
+logger = structlog.get_logger()
+
+# Largest `limit` the statistics endpoints accept; the store only returns this many groups per distribution
+STATS_MAX_LIMIT = 50
+
+
+# Overview totals: response key -> PROV-O class whose distinct instances are counted
+OVERVIEW_COUNTS = {
+    "total_artworks": "http://www.w3.org/ns/prov#Entity",
+    "total_artists": "http://www.w3.org/ns/prov#Agent",
+    "total_events": "http://www.w3.org/ns/prov#Activity",
+    "total_locations": "http://www.w3.org/ns/prov#Location",
+}
+
+# Fallback for classes the store does not count as triples are added
+COUNT_QUERY = """
+SELECT (COUNT(DISTINCT ?x) AS ?count)
+WHERE {{
+    ?x a <{class_uri}> .
+}}
+"""
+
+# Built once at import, so every refresh sends the store (and its parse cache) the same strings
+OVERVIEW_QUERIES = {class_uri: COUNT_QUERY.format(class_uri=class_uri) for class_uri in OVERVIEW_COUNTS.values()}
+
+# Types and materials are counted by node alone and labelled afterwards with LABEL_QUERY, so the
+# group-by is a single predicate scan and only the returned groups pay for the label join
+BY_TYPE_QUERY = """
+PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
+
+SELECT ?type (COUNT(?type) AS ?artwork_count)
+WHERE {
+    ?artwork crm:P2_has_type ?type .
+}
+GROUP BY ?type
+ORDER BY DESC(?artwork_count)
+"""
+
+BY_MATERIAL_QUERY = """
+PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
+
+SELECT ?material (COUNT(?material) AS ?artwork_count)
+WHERE {
+    ?artwork crm:P45_consists_of ?material .
+}
+GROUP BY ?material
+ORDER BY DESC(?artwork_count)
+"""
+
+LABEL_QUERY = """
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?label
+WHERE {
+    ?this rdfs:label ?label .
+}
+"""
+
+TOP_ARTISTS_QUERY = """
+PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
+PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+
+SELECT ?label (COUNT(?artist) as ?artwork_count) ?artist
+WHERE {
+    ?event crm:P14_carried_out_by ?artist ;
+           crm:P108_has_produced ?artwork .
+    ?artist foaf:name ?label .
+}
+GROUP BY ?artist ?label
+ORDER BY DESC(?artwork_count)
+"""
+
+# Locations are named with rdfs:label (artists with foaf:name)
+TOP_LOCATIONS_QUERY = """
+PREFIX crm:  <http://www.cidoc-crm.org/cidoc-crm/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?label (COUNT(?location) as ?artwork_count) ?location
+WHERE {
+    ?event crm:P7_took_place_at ?location ;
+           crm:P108_has_produced ?artwork .
+    ?location rdfs:label ?label .
+}
+GROUP BY ?location ?label
+ORDER BY DESC(?artwork_count)
+"""
+
+
+# Label the importer gives unnamed types and materials; empty labels are counted under it as well
+UNKNOWN_LABEL = "Unknown"
+
+# Snapshot key -> (group-by query, placeholder label to leave out, row formatter, whether rows still need a label).
+# Placeholder groups are dropped here rather than with a FILTER on every row in the store.
+# Every row is (?label, ?artwork_count, ...) by the time it is formatted, so formatters take it unpacked: ResultRow
+# attribute access goes through a Python-level __getattr__, and COUNT literals already carry their int in .value.
+# Labelled rows are merged by label first (see _merge_by_label) and arrive as (str, int).
+DISTRIBUTIONS = {
+    "by_type": (BY_TYPE_QUERY, None, lambda label, count: {"type": label, "count": count}, True),
+    "by_material": (BY_MATERIAL_QUERY, UNKNOWN_LABEL, lambda label, count: {"material": label, "count": count}, True),
+    "top_artists": (TOP_ARTISTS_QUERY, "Unknown Artist", lambda label, count, artist: {
+        "artist_uri": str(artist), "name": str(label), "artwork_count": count.value
+    }, False),
+    "top_locations": (TOP_LOCATIONS_QUERY, "Unknown Location", lambda label, count, location: {
+        "location_uri": str(location), "name": str(label), "artwork_count": count.value
+    }, False),
+}
+
+
+async def _count_instances(rdf_service, class_uri: str) -> int:
+    """One overview count: the store's running counter when it keeps one, otherwise a (cached) COUNT query"""
+
+    count = rdf_service.instance_count(class_uri)
+    if count is not None:
+        return count
+
+    rows = await cached_execute(rdf_service, OVERVIEW_QUERIES[class_uri])
+    return int(rows[0]["count"]) if rows and rows[0]["count"] else 0
+
+
+def _merge_by_label(rows) -> List[tuple]:
+    """(label, count) rows with the counts of groups sharing a label summed, largest first.
+
+    The importer mints one entity per (name, link), so several nodes can carry the same label,
+    and an empty label is the same unnamed group as UNKNOWN_LABEL.
+    """
+
+    counts: Dict[str, int] = {}
+    for label, count in rows:
+        label = str(label) or UNKNOWN_LABEL
+        counts[label] = counts.get(label, 0) + count.value
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+
+class StatsAggregator:
+    """Holds the dashboard aggregates for the current graph generation"""
+
+    def __init__(self, rdf_service):
+        self.rdf_service = rdf_service
+        self._stats: Optional[Dict[str, Any]] = None
+        self._generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Current snapshot, recomputed first if the graph changed since it was built.
+
+        The snapshot is shared between callers and must not be mutated.
+        """
+
+        if self._generation != self.rdf_service.generation:
+            async with self._lock:
+                if self._generation != self.rdf_service.generation:
+                    await self._refresh()
+        return self._stats
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute every aggregate now"""
+
+        async with self._lock:
+            await self._refresh()
+        return self._stats
+
+    async def _refresh(self):
+        rdf_service = self.rdf_service
+        generation = rdf_service.generation
+
+        # The counts and group-bys are independent, so they run side by side in worker threads
+        totals, *distributions = await asyncio.gather(
+            asyncio.gather(*(_count_instances(rdf_service, class_uri) for class_uri in OVERVIEW_COUNTS.values())),
+            *(self._collect(*distribution) for distribution in DISTRIBUTIONS.values())
+        )
+
+        self._stats = {"overview": dict(zip(OVERVIEW_COUNTS, totals)), **dict(zip(DISTRIBUTIONS, distributions))}
+        self._generation = generation
+        logger.info(f"Refreshed dashboard statistics for graph generation {generation}")
+
+    async def _collect(self, query: str, placeholder: Optional[str], format_row, needs_label: bool) -> List[Dict[str, Any]]:
+        """Format the rows of a group-by query in one pass as they are produced, in a worker thread"""
+
+        # Queries are ordered by count, so the top STATS_MAX_LIMIT groups cover every limit a client can ask for;
+        # one extra row makes up for a dropped placeholder. Groups merged by label can move up the order,
+        # so those are all labelled before the top ones are taken.
+        limited_query = f"{query}LIMIT {STATS_MAX_LIMIT + 1}\n"
+
+        def collect():
+            if needs_label:
+                rows = _merge_by_label(self._labelled(self.rdf_service.iter_sparql(query)))
+            else:
+                rows = self.rdf_service.iter_sparql(limited_query)
+            return [format_row(*row) for row in rows if (str(row[0]) or placeholder) != placeholder][:STATS_MAX_LIMIT]
+
+        return await asyncio.to_thread(collect)
+
+    def _labelled(self, rows):
+        """(?label, ?artwork_count) for each (node, ?artwork_count) row; nodes without an rdfs:label are left out"""
+
+        for node, count in rows:
+            for (label,) in self.rdf_service.iter_sparql(LABEL_QUERY, {"this": node}):
+                yield label, count
+                break
@@ -0,0 +1,37 @@
+"""
+Incremental JSON responses for large result sets
+The body is written in batches so the first bytes go out before the whole list is encoded
+"""
+
+import orjson
+from typing import Any, Dict, Iterator, List, Optional
+from fastapi.responses import StreamingResponse
+from app.config import settings
+
+STREAM_BATCH_SIZE = 256
+
+
+def should_stream(items: List[Any]) -> bool:
+    """Small lists are cheaper to send in one piece"""
+    return len(items) > settings.STREAM_MIN_ITEMS
+
+
+def iter_json_array(items: List[Any], head: bytes = b"", tail: bytes = b"") -> Iterator[bytes]:
+    """Yield head, the items as a JSON array encoded a batch at a time, then tail"""
+    
+    yield head + b"["
+    for start in range(0, len(items), STREAM_BATCH_SIZE):
+        batch = b",".join(orjson.dumps(item) for item in items[start:start + STREAM_BATCH_SIZE])
+        yield batch if start == 0 else b"," + batch
+    yield b"]" + tail
+
+
+def stream_list_response(envelope: Dict[str, Any], list_key: str, items: List[Any], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Stream {**envelope, list_key: items} with the list written last"""
+    
+    head = orjson.dumps(envelope)[:-1]
+    if envelope:
+        head += b","
+    head += orjson.dumps(list_key) + b":"
+    
+    return StreamingResponse(iter_json_array(items, head=head, tail=b"}"), media_type="application/json", headers=headers)
@@ -0,0 +1,15 @@
+"""
+URI prefixes for resources minted by the Heritage Provenance System
+Built once at import so routers and the importer only append identifiers
+"""
+
+from app.config import settings
+
+
+BASE_URI = settings.BASE_URI
+
+ARTIST_URI_PREFIX = BASE_URI + "artist/"
+ARTWORK_URI_PREFIX = BASE_URI + "artwork/"
+LOCATION_URI_PREFIX = BASE_URI + "location/"
+EVENT_URI_PREFIX = BASE_URI + "event/"
+ATTRIBUTE_URI_PREFIX = BASE_URI + "attributes/"
@@ -0,0 +1,34 @@
+"""
+Query-string filters as the frontend sends them: unset dropdowns arrive as empty parameters
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/api/artworks/", "/api/artworks/stream"])
+def test_artworks_accept_empty_filters(client, path):
+    response = client.get(f"{path}?type_id=&material_id=&subject_id=&artist_id=&location_id=")
+    assert response.status_code == 200
+
+
+def test_artists_accept_empty_location_filter(client):
+    response = client.get("/api/artists/?location_id=")
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("path", [
+    "/api/artworks/?material_id=not%20an%20id",
+    "/api/artworks/stream?artist_id=%3Chttp://x%3E",
+    "/api/artists/?location_id=a%22b",
+])
+def test_malformed_filters_are_rejected(client, path):
+    response = client.get(path)
+    assert response.status_code == 422
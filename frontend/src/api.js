@@ -30,6 +30,7 @@ export const getProvenanceChain = (artworkId) => api.get(`/provenance/${artworkI
 
 // Visualization
 export const getOverviewStats = () => api.get('/visualization/statistics/overview')
+export const getDashboardStats = (limit) => api.get('/visualization/statistics/dashboard', { params: { limit } })
 export const getArtworksByType = () => api.get('/visualization/statistics/by-type')
 export const getArtworksByMaterial = () => api.get('/visualization/statistics/by-material')
 export const getTopArtists = (limit) => api.get('/visualization/statistics/top-artists', { params: { limit } })
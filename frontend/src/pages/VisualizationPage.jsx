@@ -1,45 +1,28 @@
 import { useQuery } from '@tanstack/react-query'
 import Plot from 'react-plotly.js'
 import { 
-  getOverviewStats, 
-  getArtworksByType, 
-  getTopArtists,
-  getTopLocations,
-  getArtistNetwork,
-  getArtworksByMaterial
+  getDashboardStats,
+  getArtistNetwork
 } from '../api'
 
 const VisualizationPage = () => {
-  const { data: stats } = useQuery({
-    queryKey: ['overviewStats'],
-    queryFn: () => getOverviewStats().then(res => res.data)
+  // Overview and every chart come from one request
+  const { data: dashboard } = useQuery({
+    queryKey: ['dashboardStats', 10],
+    queryFn: () => getDashboardStats(10).then(res => res.data)
   })
 
-  const { data: typeData } = useQuery({
-    queryKey: ['artworksByType'],
-    queryFn: () => getArtworksByType().then(res => res.data)
-  })
-
-  const { data: materialData } = useQuery({
-    queryKey: ['artworksByMaterial'],
-    queryFn: () => getArtworksByMaterial().then(res => res.data)
-  })
-
-  const { data: artistsData } = useQuery({
-    queryKey: ['topArtists'],
-    queryFn: () => getTopArtists(10).then(res => res.data)
-  })
+  const stats = dashboard?.overview
+  const typeData = dashboard?.by_type
+  const materialData = dashboard?.by_material
+  const artistsData = dashboard?.top_artists
+  const locationsData = dashboard?.top_locations
 
   const { data: artistNetworkData } = useQuery({
     queryKey: ['artistNetwork'],
     queryFn: () => getArtistNetwork("5a4d2e7f-4f3e-4574-8774-75db4883e2c1").then(res => res.data)
   })
 
-  const { data: locationsData } = useQuery({
-    queryKey: ['topLocations'],
-    queryFn: () => getTopLocations(10).then(res => res.data)
-  })
-
   return (
     <div className="space-y-8">
       <h2 className="text-3xl font-bold text-white">Data Visualizations</h2>